@@ -24,6 +24,7 @@ from .interface import Suite as _Suite
 from .interface import known_suite_names
 from .utilities import ExperimentRepeater
 from .utilities import BatchScheduler
+from .utilities import run_experiment
 from .interface import log_level # noqa: F401
 from ._version import __version__ # noqa: F401
 
@@ -34,6 +35,7 @@ __all__ = [
     'known_suite_names', 
     'ExperimentRepeater', 
     'BatchScheduler',
+    'run_experiment',
     'default_observers'
 ]
 
@@ -436,12 +438,17 @@ class Problem(_Problem):
     """
     def __init__(self):
         super().__init__()
-    def constraint(self, x):
+    def constraint(self, x, out=None):
         """return constraint values for `x`. 
 
         By convention, constraints with values <= 0 are satisfied.
+
+        A 2-D `x` of shape ``(n, dimension)`` is evaluated row by row and
+        returns an array of shape ``(n, number_of_constraints)``. When the
+        buffer `out` is given, the values are written into `out`, which is
+        returned.
         """
-        return super().constraint(x)
+        return super().constraint(x, out)
 
     def logger_biobj_feed_solution(self, evaluation, y):
         """Feed the given solution to logger_biobj in order to reconstruct its
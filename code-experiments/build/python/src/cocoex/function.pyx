@@ -14,7 +14,7 @@ cdef extern from 'coco.h':
         pass
 
     char *coco_problem_get_id(coco_problem_t *p)
-    void coco_evaluate_function(coco_problem_t *p, double *x, double *y)
+    void coco_evaluate_function(coco_problem_t *p, double *x, double *y) nogil
     void coco_problem_free(coco_problem_t *p)
 
 # IMPORTANT: These functions are *not* declared public in coco.h so we have to
@@ -115,33 +115,51 @@ cdef class BenchmarkFunction:
     def __repr__(self):
         return f"BenchmarkFunction('{self.suite}', {self.function}, {self.dimension}, {self.instance})"
 
-    def __call__(self, x):
-        cdef double[::1] xi
+    def __call__(self, x, out=None):
+        """Evaluate the function at `x` or at each row of a 2-D `x`.
+
+        The GIL is released during the evaluation, hence different
+        functions can be evaluated concurrently from several threads.
+
+        Parameters
+        ----------
+        x
+            A solution or a 2-D array with one solution per row, each of
+            length `dimension`, otherwise a `ValueError` is raised.
+            C-contiguous arrays and memoryviews of doubles are not copied.
+
+        out
+            Optional writable C-contiguous array of doubles with one entry
+            per solution. The values are written into `out`, which is
+            returned.
+        """
         cdef double[:, ::1] X
+        cdef double[::1] Y
         cdef Py_ssize_t N, D, i
-        cdef double[::1] y_view
         cdef double y
-        if isinstance(x, list):
-            x = np.array(x, dtype=float)
-        if x.ndim == 1:
-            # Evaluate a single parameter
-            xi = np.array(x, dtype=float)
-            coco_evaluate_function(self._problem, &xi[0], &y)
-            return y
-        elif x.ndim == 2:
-            # Evaluate several parameters at once
-            X = x
-            N = X.shape[0]
-            D = X.shape[1]
+        x = np.asarray(x, dtype=float, order='C')
+        if x.ndim not in (1, 2):
+            return None
+        X = x.reshape(-1, x.shape[-1])
+        N = X.shape[0] if x.ndim == 2 else 1
+        D = X.shape[1]
+        if D != self.dimension:
+            raise ValueError(
+                "Dimension, `np.shape(x)[-1]==%d`, of input `x` does " % D +
+                "not match the function dimension `dimension==%d`." % self.dimension)
+        if out is None:
             Y = np.zeros(N, dtype=np.float64)
-            y_view = Y
-            for i in range(N):
-                xi = X[i, :]
-                coco_evaluate_function(self._problem, &xi[0], &y)
-                y_view[i] = y
-            return Y
         else:
-          return None
-
+            Y = out  # fails unless `out` is a 1-D C-contiguous buffer of doubles
+            if Y.shape[0] != N:
+                raise ValueError("`out` must have %d entries, got %d" % (N, Y.shape[0]))
+        with nogil:
+            for i in range(N):
+                coco_evaluate_function(self._problem, &X[i, 0], &Y[i])
+        if out is not None:
+            return out
+        if x.ndim == 1:
+            return Y[0]
+        return np.asarray(Y)
 
 __all__ = ["BenchmarkFunction"]
@@ -47,8 +47,8 @@ cdef extern from "coco.h":
     void coco_problem_free(coco_problem_t *problem)
 
     void coco_problem_get_initial_solution(coco_problem_t *problem, double *x)
-    void coco_evaluate_function(coco_problem_t *problem, const double *x, double *y)
-    void coco_evaluate_constraint(coco_problem_t *problem, const double *x, double *y)
+    void coco_evaluate_function(coco_problem_t *problem, const double *x, double *y) nogil
+    void coco_evaluate_constraint(coco_problem_t *problem, const double *x, double *y) nogil
     void coco_recommend_solution(coco_problem_t *problem, const double *x)
 
     int coco_logger_biobj_feed_solution(coco_problem_t *problem, const size_t evaluation, const double *y)
@@ -502,6 +502,32 @@ cdef class Observer:
         if self._observer !=  NULL:
             coco_observer_free(self._observer)
 
+cdef void _evaluate_rows(coco_problem_t *problem, const double *x, double *y,
+                         Py_ssize_t n, size_t dimension, size_t number_of_values,
+                         bint constraints) noexcept nogil:
+    """evaluate `n` consecutive solutions of length `dimension` from `x`
+    into `y`, in order"""
+    cdef Py_ssize_t i
+    for i in range(n):
+        if constraints:
+            coco_evaluate_constraint(problem, x + i * dimension, y + i * number_of_values)
+        else:
+            coco_evaluate_function(problem, x + i * dimension, y + i * number_of_values)
+
+cdef np.ndarray _output_array(out, Py_ssize_t size):
+    """return a flat array sharing the memory of the caller-provided
+    buffer `out`, which must hold exactly `size` writable C-contiguous
+    doubles"""
+    try:
+        a = np.asarray(memoryview(out))
+    except TypeError:
+        raise TypeError("`out` must support the buffer protocol, got %s" % str(type(out)))
+    if (a.dtype != np.double or not a.flags.c_contiguous
+            or not a.flags.writeable or a.size != size):
+        raise ValueError("`out` must be a writable C-contiguous buffer of "
+                         "%d doubles, got dtype=%s and size=%d" % (size, a.dtype, a.size))
+    return a.reshape(-1)
+
 cdef Problem_init(coco_problem_t* problem, free=True, suite_name=None):
     """`Problem` class instance initialization wrapper passing
     a `problem_t*` C-variable to `__init__`.
@@ -569,26 +595,68 @@ cdef class Problem:
         self.initialized = True
         return self
 
-    def constraint(self, x):
+    def constraint(self, x, out=None):
         """see __init__.py"""
         if self.number_of_constraints <= 0:
             return  # return None, prevent Python kernel from dying
             # or should we return `[]` for zero constraints?
             # `[]` is more likely to produce quietly unexpected result?
-        cdef np.ndarray[double, ndim=1, mode="c"] _x
-        x = np.asarray(x, dtype=np.double, order='C')
-        if np.size(x) != self.number_of_variables:
-            raise ValueError(
-                "Dimension, `np.size(x)==%d`, of input `x` does " % np.size(x) +
-                "not match the problem dimension `number_of_variables==%d`."
-                             % self.number_of_variables)
-        _x = x  # this is the final type conversion
+        y = self._evaluate(x, out, self._number_of_constraints, True)
+        if out is not None:
+            return out
+        if y is self.constraint_values:
+            return np.array(y, copy=True)
+        return y
+
+    cdef _evaluate(self, x, out, size_t number_of_values, bint constraints):
+        """evaluate `x` or, for 2-D `x`, each of its rows in a single loop.
+
+        Return an array of shape ``(number_of_values,)`` or
+        ``(len(x), number_of_values)``, written into the buffer `out` when
+        it is given. Without `out`, a single `x` is evaluated into the
+        reused `y_values` or `constraint_values` array.
+
+        Each row is passed to the C evaluation in order, hence observers
+        and loggers see every single evaluation. When no observer is
+        attached, the GIL is released during the evaluation.
+        """
+        cdef np.ndarray _x
+        cdef np.ndarray _y
+        cdef Py_ssize_t n
+        _x = np.asarray(x, dtype=np.double, order='C')  # no copy for contiguous doubles
+        if _x.ndim == 2:
+            if _x.shape[1] != self._number_of_variables:
+                raise ValueError(
+                    "Dimension, `np.shape(x)[1]==%d`, of input `x` does " % _x.shape[1] +
+                    "not match the problem dimension `number_of_variables==%d`."
+                                 % self.number_of_variables)
+            n = _x.shape[0]
+        else:
+            if _x.size != self._number_of_variables:
+                raise ValueError(
+                    "Dimension, `np.size(x)==%d`, of input `x` does " % _x.size +
+                    "not match the problem dimension `number_of_variables==%d`."
+                                 % self.number_of_variables)
+            n = 1
         if self.problem is NULL:
             raise InvalidProblemException()
-        coco_evaluate_constraint(self.problem,
-                               <double *>np.PyArray_DATA(_x),
-                               <double *>np.PyArray_DATA(self.constraint_values))
-        return np.array(self.constraint_values, copy=True)
+        if out is not None:
+            _y = _output_array(out, n * number_of_values)
+        elif _x.ndim == 2:
+            _y = np.zeros((n, number_of_values))
+        else:
+            _y = self.constraint_values if constraints else self.y_values
+        cdef coco_problem_t *problem = self.problem
+        cdef const double *x_data = <double *>np.PyArray_DATA(_x)
+        cdef double *y_data = <double *>np.PyArray_DATA(_y)
+        cdef size_t dimension = self._number_of_variables
+        if self._list_of_observers:  # loggers are not thread-safe
+            _evaluate_rows(problem, x_data, y_data, n, dimension, number_of_values, constraints)
+        else:
+            with nogil:
+                _evaluate_rows(problem, x_data, y_data, n, dimension, number_of_values, constraints)
+        return _y
+
     def recommend(self, arx):
         """Recommend a solution, return `None`.
 
@@ -811,25 +879,26 @@ cdef class Problem:
             coco_problem_free(self.problem)
 
     # def __call__(self, np.ndarray[double, ndim=1, mode="c"] x):
-    def __call__(self, x):
-        """return objective function value of input `x`"""
-        cdef np.ndarray[double, ndim=1, mode="c"] _x
+    def __call__(self, x, out=None):
+        """return objective function value of input `x`.
+
+        A 2-D `x` of shape ``(n, number_of_variables)`` is evaluated row by
+        row and returns an array of ``n`` values, or of shape
+        ``(n, number_of_objectives)`` when there is more than one objective.
+
+        When the buffer `out` is given, the values are written into `out`,
+        which is returned. `out` must be a writable C-contiguous array of
+        doubles with one entry per objective and solution.
+        """
         assert self.initialized
-        x = np.asarray(x, dtype=np.double, order='C')
-        if np.size(x) != self.number_of_variables:
-            raise ValueError(
-                "Dimension, `np.size(x)==%d`, of input `x` does " % np.size(x) +
-                "not match the problem dimension `number_of_variables==%d`."
-                             % self.number_of_variables)
-        _x = x  # this is the final type conversion
-        if self.problem is NULL:
-            raise InvalidProblemException()
-        coco_evaluate_function(self.problem,
-                               <double *>np.PyArray_DATA(_x),
-                               <double *>np.PyArray_DATA(self.y_values))
+        y = self._evaluate(x, out, self._number_of_objectives, False)
+        if out is not None:
+            return out
+        if np.ndim(y) == 2:
+            return y[:, 0] if self._number_of_objectives == 1 else y
         if self._number_of_objectives == 1:
-            return self.y_values[0]
-        return np.array(self.y_values, copy=True)
+            return y[0]
+        return np.array(y, copy=True)
 
     @property
     def id(self):
@@ -15,11 +15,12 @@ def random_search(fun, lbounds, ubounds, budget):
         # about five times faster than "for k in range(budget):..."
         X = lbounds + (ubounds - lbounds) * np.random.rand(chunk, dim)
         if fun.number_of_constraints > 0:
-            FC = [(fun(x), fun.constraint(x)) for x in X]  # call  objective and constraints
-            F = [fc[0] for fc in FC if all(fc[1] <= 0)]
+            F, C = fun(X), fun.constraint(X)  # call objective and constraints
+            feasible = np.all(C <= 0, axis=1)
+            X, F = X[feasible], F[feasible]
             budget -= chunk  # one more to account for constraint evals
         else:
-            F = [fun(x) for x in X]
+            F = fun(X)  # evaluates all rows in a single call
         if fun.number_of_objectives == 1:
             index = np.argmin(F) if len(F) else None
             if index is not None and (f_min is None or F[index] < f_min):
@@ -2,8 +2,10 @@ import ast as _ast  # avoid name space polluting
 import os as _os
 import sys as _sys
 import time as _time
+import shutil as _shutil
 import warnings as _warnings
 import collections as _collections  # defaultdict, OrderedDict
+import multiprocessing as _multiprocessing
 
 import numpy as np
 
@@ -926,7 +928,11 @@ class BatchScheduler:
     Details: to get a more even time distribution over all batches, it
     seems advisable that the number of functions is not divisible by the
     number of batches. That is, 4 (or 6 or 8 or 12) batches is not likely
-    to be ideal on the `'bbob'` testbed of 24 functions.
+    to be ideal on the `'bbob'` testbed of 24 functions. Alternatively,
+    `balance` distributes the problems by their estimated cost::
+
+        batcher = cocoex.BatchScheduler(4, batch_to_execute).balance(
+                                suite, repeater.budget_from_dimension)
     """
     def __init__(self, number_of_batches, batch_to_execute):
         """distribute over `number_of_batches` batches and execute
@@ -938,6 +944,8 @@ class BatchScheduler:
         self.first_problem = None
         self.current_problem = None
         self.current_batch = -1
+        self.batch_of = None
+        '''`dict` with ``(id_function, dimension)`` keys set in `balance`'''
         if self.params['number_of_batches'] == 1 and self.params['batch_to_execute'] in (0, 1, None):
             print("number_of_batches == 1, hence running the full suite")
             self.params['batch_to_execute'] = 0
@@ -961,6 +969,13 @@ class BatchScheduler:
         suit with the same function ID and dimension belong to the same
         batch.
         """
+        if self.batch_of is not None:
+            try:
+                return self.batch_of[(problem.id_function, problem.dimension)
+                                     ] == self.params['batch_to_execute']
+            except KeyError:
+                raise ValueError("problem {} was not in the suite passed to `balance`"
+                                 .format(problem.id))
         if self.first_problem is None:
             self.first_problem = (problem.id_function, problem.dimension)
         if self.current_problem != (problem.id_function, problem.dimension):
@@ -969,3 +984,169 @@ class BatchScheduler:
             self.current_problem = (problem.id_function, problem.dimension)
             self.current_batch += 1
         return self.current_batch % self.params['number_of_batches'] == self.params['batch_to_execute']
+    def balance(self, suite, budget=None, seconds_per_evaluation=None):
+        """assign problems to batches of about equal estimated cost, return `self`.
+
+        After the call, `is_in_batch` uses this assignment instead of the
+        order of appearance. The cost of each ``(id_function, dimension)``
+        is estimated as the number of instances in `suite` times
+        ``budget(dimension)`` times the seconds per evaluation, where
+
+        - `budget` is a function of the dimension, for example
+          `ExperimentRepeater.budget_from_dimension`, by default the
+          dimension,
+        - `seconds_per_evaluation` is a `dict` with dimensions as keys, for
+          example ``ShortInfo.evals_by_dimension`` from a previous run.
+          Missing dimensions are extrapolated linearly from the closest
+          given dimension. By default the cost of an evaluation is
+          proportional to the dimension.
+
+        Problems are packed greedily, the most expensive first, into the
+        batch with the currently smallest cost (longest processing time
+        first). Ties are broken by ``(id_function, dimension)`` and batch
+        number, hence independent processes get the same assignment
+        without coordination, given the same arguments.
+
+        >>> import cocoex
+        >>> suite = cocoex.Suite('bbob', '', 'dimensions: 2,40')
+        >>> batchers = [cocoex.BatchScheduler(4, i).balance(suite) for i in range(4)]
+        >>> sum(sum(b.is_in_batch(p) for b in batchers) == 1 for p in suite)
+        720
+        >>> sum(batchers[0].is_in_batch(p) for p in suite)
+        180
+        """
+        if budget is None:
+            budget = lambda dimension: dimension
+        def cost_per_evaluation(dimension):
+            if not seconds_per_evaluation:
+                return dimension
+            closest = min(seconds_per_evaluation, key=lambda d: (abs(d - dimension), d))
+            return seconds_per_evaluation[closest] * dimension / closest
+        costs = _collections.OrderedDict()
+        for problem_id in suite.ids():
+            key = _problem_id_to_function_dimension(problem_id)
+            costs[key] = costs.get(key, 0) + budget(key[1]) * cost_per_evaluation(key[1])
+        loads = self.params['number_of_batches'] * [0]
+        self.batch_of = {}
+        for key in sorted(costs, key=lambda key: (-costs[key], key)):
+            batch = loads.index(min(loads))  # smallest load, first one on ties
+            self.batch_of[key] = batch
+            loads[batch] += costs[key]
+        return self
+
+def _problem_id_to_function_dimension(problem_id):
+    """return ``(id_function, dimension)`` parsed from a problem id like
+    ``'bbob_f001_i01_d02'``"""
+    return tuple(int(problem_id[problem_id.find(substr) + len(substr):].split('_')[0])
+                 for substr in ('_f', '_d'))
+
+def problem_batches(suite):
+    """return a `list` of `list` of problem indices of `suite`,
+
+    one `list` for each ``(id_function, dimension)``, in the same way as
+    `BatchScheduler` attributes consecutive problems to batches.
+    Batches with larger dimension come first, as they are (likely) more
+    expensive to run.
+    """
+    batches, keys = [], []
+    for index, problem_id in enumerate(suite.ids()):
+        key = _problem_id_to_function_dimension(problem_id)
+        if not keys or key != keys[-1]:
+            batches.append([])
+            keys.append(key)
+        batches[-1].append(index)
+    return [batch for _, batch in sorted(zip(keys, batches), key=lambda kb: -kb[0][1])]
+
+_experiment_worker = {}  # the suite, observer and solver of the current process
+
+def _init_experiment_worker(solver, suite_args, observer_name, observer_options):
+    """create the suite and an observer writing into its own folder"""
+    from . import Observer, Suite  # avoid circular import
+    _experiment_worker['solver'] = solver
+    _experiment_worker['suite'] = Suite(*suite_args)
+    _experiment_worker['observer'] = Observer(observer_name, dict(
+        observer_options, result_folder='process%d' % _os.getpid()))
+
+def _run_experiment_batch(indices):
+    """run the solver on the problems with suite `indices`"""
+    suite, observer = _experiment_worker['suite'], _experiment_worker['observer']
+    for index in indices:
+        problem = suite.get_problem(index, observer)
+        try:
+            _experiment_worker['solver'](problem)
+        finally:
+            problem.free()  # finalizes the logger output
+    return len(indices)
+
+def run_experiment(solver, suite_name, suite_instance='', suite_options='',
+                   observer_name=None, observer_options=None, processes=None):
+    """run ``solver(problem)`` on all problems of a suite in parallel and
+    return the result folder which contains the data of all processes.
+
+    The problems are distributed over a pool of `processes` processes
+    (by default ``os.cpu_count()``) in batches of the same
+    ``(id_function, dimension)``, see `problem_batches`. Each process
+    picks up the next batch when it finished the previous one, hence
+    batches of very different cost are balanced automatically.
+
+    Each process writes with its own observer into a subfolder of the
+    result folder. The result folder can be passed as a single algorithm
+    to `cocopp`, like ``cocopp.main(result_folder)``.
+
+    `solver` is called with the observed problem and needs to respect
+    the budget itself. With more than one process, `solver` must be
+    picklable, that is, defined at module level and not as ``lambda``,
+    because the ``'spawn'`` and ``'forkserver'`` start methods pickle it.
+    `observer_options` is a `dict`, where ``result_folder`` names the
+    result folder as with `Observer`. The default `observer_name` is
+    taken from `default_observers`. When the process pool fails, the
+    result folder is removed.
+
+    Example::
+
+        import cocoex, cocopp
+
+        def solver(problem):
+            cocoex.solvers.random_search(problem, problem.lower_bounds,
+                                         problem.upper_bounds, 100 * problem.dimension)
+
+        if __name__ == '__main__':  # required with the 'spawn' start method
+            folder = cocoex.run_experiment(
+                solver, 'bbob', '', 'dimensions: 2,3,5',
+                observer_options={'result_folder': 'random-search'})
+            cocopp.main(folder)
+    """
+    from . import Observer, Suite, default_observers  # avoid circular import
+    if observer_name is None:
+        observer_name = default_observers()[suite_name]
+    observer_options = dict(observer_options or {})
+    # the observer creates a unique folder which hosts the process folders
+    observer = Observer(observer_name, observer_options)
+    observer_options['outer_folder'] = observer.result_folder
+    del observer
+    suite_args = (suite_name, suite_instance, suite_options)
+    batches = problem_batches(Suite(*suite_args))
+    initargs = (solver, suite_args, observer_name, observer_options)
+    processes = min(processes or _os.cpu_count() or 1, len(batches))
+    if processes <= 1:
+        _init_experiment_worker(*initargs)
+        for batch in batches:
+            _run_experiment_batch(batch)
+        _experiment_worker.clear()  # deallocates the observer
+    else:
+        try:
+            pool = _multiprocessing.Pool(processes, _init_experiment_worker, initargs)
+        except:
+            _shutil.rmtree(observer_options['outer_folder'], ignore_errors=True)
+            raise
+        try:
+            for _ in pool.imap_unordered(_run_experiment_batch, batches, chunksize=1):
+                pass
+            pool.close()
+        except:
+            pool.terminate()
+            pool.join()
+            _shutil.rmtree(observer_options['outer_folder'], ignore_errors=True)
+            raise
+        pool.join()
+    return observer_options['outer_folder']
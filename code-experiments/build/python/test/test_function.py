@@ -32,3 +32,23 @@ def test_multiple_parameters():
         y = fn(X)
         assert len(y) == n
         assert np.all(y >= fn.best_value())
+
+
+def test_out_and_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    X = np.random.uniform(-5, 5, size=(50, 4))
+    fns = [BenchmarkFunction("bbob", fid, 4, 1) for fid in range(1, 25)]
+    out = np.empty(len(X))
+    assert fns[0](X, out=out) is out
+    assert np.array_equal(out, fns[0](X))
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda fn: fn(X), fns))
+    for fn, y in zip(fns, results):
+        assert np.array_equal(y, fn(X))
+
+
+def test_wrong_dimension():
+    fn = BenchmarkFunction("bbob", 1, 3, 1)
+    for x in (np.zeros((2, 2)), np.zeros((2, 5)), np.zeros(2), np.zeros(4)):
+        with pytest.raises(ValueError):
+            fn(x)
@@ -41,3 +41,66 @@ def test_bbob2009():
             test_vector = test_vectors[int(test_vector_id)]
             y = problem(test_vector[:problem.number_of_variables])
             assert y == pytest.approx(float(expected_y))
+
+
+def test_batch_evaluation():
+    for suite_name in ["bbob", "bbob-biobj", "bbob-constrained"]:
+        suite = Suite(suite_name, "", "dimensions:5 instance_indices:1")
+        for index in range(0, len(suite), 7):
+            problem = suite.get_problem(index)
+            X = np.random.uniform(-5, 5, size=(10, problem.dimension))
+            assert np.array_equal(problem(X), np.array([problem(x) for x in X]))
+            if problem.number_of_constraints > 0:
+                assert np.array_equal(problem.constraint(X),
+                                      np.array([problem.constraint(x) for x in X]))
+            with pytest.raises(ValueError):
+                problem(np.zeros((2, problem.dimension + 1)))
+
+
+def test_out_buffer():
+    suite = Suite("bbob-biobj", "", "dimensions:5 instance_indices:1")
+    problem = suite.get_problem(3)
+    X = np.random.uniform(-5, 5, size=(10, problem.dimension))
+    out = np.empty((10, problem.number_of_objectives))
+    assert problem(X, out=out) is out
+    assert np.array_equal(out, problem(X))
+    out = np.empty(problem.number_of_objectives)
+    assert problem(X[0], out) is out
+    assert np.array_equal(out, problem(X[0]))
+    with pytest.raises(ValueError):
+        problem(X, out=np.empty(10))
+
+
+def _random_search(problem):
+    """module-level solver, such that it can be pickled for the process pool"""
+    from cocoex import solvers
+    solvers.random_search(problem, problem.lower_bounds, problem.upper_bounds,
+                          10 * problem.dimension)
+
+
+def test_run_experiment(tmp_path, monkeypatch):
+    from cocoex import run_experiment
+    monkeypatch.chdir(tmp_path)
+    folder = run_experiment(
+        _random_search, "bbob", "", "dimensions:2,3 instance_indices:1-2",
+        observer_options={"result_folder": "random_search"}, processes=2)
+    data_files = sorted(path.name for path in Path(folder).glob("*/data_f*/*.dat"))
+    assert data_files == sorted("bbobexp_f%d_DIM%d.dat" % (fid, dimension)
+                                for fid in range(1, 25) for dimension in (2, 3))
+
+
+class _SolverError(Exception):
+    pass
+
+
+def _failing_solver(problem):
+    raise _SolverError(problem.id)
+
+
+def test_run_experiment_failing_pool(tmp_path, monkeypatch):
+    from cocoex import run_experiment
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(_SolverError):
+        run_experiment(_failing_solver, "bbob", "", "dimensions:2 instance_indices:1",
+                       observer_options={"result_folder": "failing"}, processes=2)
+    assert not list(tmp_path.glob("exdata/failing*"))
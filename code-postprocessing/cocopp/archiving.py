@@ -77,11 +77,18 @@ import time as _time
 import warnings
 import hashlib
 import ast
+import tempfile
+import threading
+from multiprocessing.pool import ThreadPool
 from . import toolsdivers as _td  # StrList
 try:
     from urllib.request import urlretrieve as _urlretrieve
+    from urllib.request import urlopen as _urlopen, Request as _Request
+    from urllib.error import HTTPError as _HTTPError
 except ImportError:
     from urllib import urlretrieve as _urlretrieve
+    from urllib2 import urlopen as _urlopen, Request as _Request
+    from urllib2 import HTTPError as _HTTPError
 
 coco_urls = ["https://coco.gforge.inria.fr/data-archive",  # original location
              "https://numbbo.github.io/gforge/data-archive",  # new backup location
@@ -98,6 +105,7 @@ import platformdirs
 cocopp_home = platformdirs.user_cache_dir("cocopp", ensure_exists=True)
 default_archive_location = os.path.join(cocopp_home, 'data-archives')
 default_definition_filename = 'coco_archive_definition.txt'
+hash_cache_filename = '.coco_archive_hashes.txt'  # next to the definition file
 cocopp_home_archives = default_archive_location
 listing_file_start = 'list_'
 listing_file_extension = '.txt'
@@ -182,10 +190,159 @@ def _definition_file_to_write(local_path_or_filename,
     _make_backup(fullname)
     return fullname
 
-def _hash(file_name, hash_function=hashlib.sha256):
-    """compute hash of file `file_name`"""
+def _hash(file_name, hash_function=hashlib.sha256, chunk_size=2**20):
+    """compute hash of file `file_name` reading chunks of `chunk_size` bytes"""
+    hash_ = hash_function()
     with open(file_name, 'rb') as file_:
-        return hash_function(file_.read()).hexdigest()
+        for chunk in iter(lambda: file_.read(chunk_size), b''):
+            hash_.update(chunk)
+    return hash_.hexdigest()
+
+class _HashCache(object):
+    """persistent memory of file hashes.
+
+    The hashes are stored as `dict` literal in the file `filename` with
+    the file paths relative to the folder of `filename` as keys. An entry
+    is only used while the file size, modification time and inode are
+    unchanged.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.folder = os.path.dirname(filename)
+        self._hashes = None  # read on first use
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path):
+        stat = os.stat(path)
+        return [stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_ino]
+
+    def _read(self):
+        try:
+            with open(self.filename, 'rt') as file_:
+                return ast.literal_eval(file_.read())
+        except (IOError, OSError, SyntaxError, ValueError):
+            return {}
+
+    def hash(self, path, hash_function=hashlib.sha256, save=True):
+        """return the hash of file `path` and memorize it if it was computed.
+
+        Write the cache file if ``save is True``.
+        """
+        with self._lock:
+            if self._hashes is None:
+                self._hashes = self._read()
+        key = os.path.relpath(os.path.abspath(path), self.folder).replace(os.path.sep, '/')
+        stamp = self._stamp(path) + [hash_function().name]
+        entry = self._hashes.get(key)
+        if entry is not None and entry[:-1] == stamp:
+            return entry[-1]
+        res = _hash(path, hash_function)
+        with self._lock:
+            self._hashes[key] = stamp + [res]
+        if save:
+            self.save()
+        return res
+
+    def remember(self, path, hash_value, hash_function=hashlib.sha256, save=True):
+        """memorize the already computed `hash_value` of file `path`"""
+        with self._lock:
+            if self._hashes is None:
+                self._hashes = self._read()
+            key = os.path.relpath(os.path.abspath(path), self.folder).replace(os.path.sep, '/')
+            self._hashes[key] = self._stamp(path) + [hash_function().name, hash_value]
+        if save:
+            self.save()
+
+    def save(self):
+        """write the cache file, silently fails if not possible"""
+        with self._lock:
+            text = repr(self._hashes)
+        try:
+            handle, tmp_filename = tempfile.mkstemp(dir=self.folder)
+            with os.fdopen(handle, 'wt') as file_:
+                file_.write(text)
+            getattr(os, 'replace', os.rename)(tmp_filename, self.filename)
+        except (IOError, OSError):
+            pass
+
+def _download_resumable(url, file_name, known_hash=None,
+                        hash_function=hashlib.sha256, chunk_size=2**16):
+    """download `url` to `file_name` via ``file_name + '.part'``, return hash.
+
+    An existing ``.part`` file from an interrupted download is continued
+    with a HTTP Range request (or restarted if the server ignores the
+    range). The ``.part`` file is kept when the download is interrupted.
+    The downloaded file is renamed to `file_name` only if its hash agrees
+    with `known_hash`, otherwise it is removed and a `ValueError` is
+    raised. With ``known_hash=None`` the file is renamed unchecked, hence
+    an existing ``.part`` file is then discarded rather than continued,
+    as it may stem from a different version of the file.
+
+    >>> import os, hashlib, shutil, tempfile
+    >>> from cocopp import archiving
+    >>> from cocopp.test import serve_folder
+    >>> folder = tempfile.mkdtemp()
+    >>> data = os.urandom(100000)
+    >>> with open(os.path.join(folder, 'data.tgz'), 'wb') as f:
+    ...     _ = f.write(data)
+    >>> data_hash = hashlib.sha256(data).hexdigest()
+    >>> url, server = serve_folder(folder)
+    >>> target = os.path.join(folder, 'copy.tgz')
+    >>> def download(part, ranges=True, known_hash=data_hash):
+    ...     server.ranges = ranges
+    ...     with open(target + '.part', 'wb') as f:
+    ...         _ = f.write(part)
+    ...     res = archiving._download_resumable(url + '/data.tgz', target, known_hash)
+    ...     with open(target, 'rb') as f:
+    ...         return res == data_hash and f.read() == data, server.codes[-1]
+    >>> download(data[:30000])  # resumed with a Range request
+    (True, 206)
+    >>> download(data[:30000], ranges=False)  # the server sends the full file
+    (True, 200)
+    >>> download(data)  # the .part file was already complete
+    (True, 416)
+    >>> download(b'x' * 30000, known_hash=None)  # no hash, not resumed
+    (True, 200)
+    >>> download(b'x' * 30000)  # doctest:+ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    ValueError: wrong checksum for download...
+    >>> os.path.exists(target + '.part')
+    False
+    >>> server.shutdown()
+    >>> shutil.rmtree(folder)
+
+    """
+    part_name = file_name + '.part'
+    offset = os.path.getsize(part_name) if os.path.exists(part_name) else 0
+    if offset and known_hash is None:  # can not check the joined file
+        os.remove(part_name)
+        offset = 0
+    request = _Request(url)
+    if offset:
+        request.add_header('Range', 'bytes=%d-' % offset)
+    try:
+        response = _urlopen(request)
+    except _HTTPError as e:
+        if not (offset and e.code == 416):  # 416: range starts at or after the end
+            raise
+        response = None
+    if response is not None:
+        try:
+            code = response.getcode()
+            with open(part_name, 'ab' if offset and code == 206 else 'wb') as file_:
+                for chunk in iter(lambda: response.read(chunk_size), b''):
+                    file_.write(chunk)
+        finally:
+            response.close()
+    res = _hash(part_name, hash_function)
+    if known_hash is not None and res != known_hash:
+        os.remove(part_name)
+        raise ValueError('wrong checksum for download\n   %s\n'
+                         'removed the downloaded file' % url)
+    getattr(os, 'replace', os.rename)(part_name, file_name)
+    return res
 
 def _str_to_list(str_or_list):
     """try to return a non-string iterable in either case"""
@@ -554,6 +711,7 @@ class COCODataArchive(_td.StrList):
         self._redownload_if_changed = []
         self._checked_consistency = False
         self._print = print  # like this we can make it quiet for testing
+        self._hash_cache = _HashCache(os.path.join(local_path, hash_cache_filename))
         self._all = self.read_definition_file()
         assert hasattr(self, '_all')
         self.remote_data_path = self._url_(self._all)  # later we could use self._all_dict.get('_url_', None)
@@ -582,7 +740,7 @@ class COCODataArchive(_td.StrList):
     def get_all(self, indices=None, remote=True):
         """Return a `list` (`StrList`) of absolute pathnames,
 
-        by repeatedly calling `get`. Elements of the `indices` list can
+        by calling `download` and then repeatedly `get`. Elements of the `indices` list can
         be an index or a (sub)string that matches one or several names
         in the archive. If ``indices is None``, the results from the
         last call to `find` are used. Data are downloaded if necessary.
@@ -596,6 +754,8 @@ class COCODataArchive(_td.StrList):
             names = self.find(indices)
         else:
             names = self.found
+        if remote and len(names) > 1:
+            self.download(names)
         return _td.StrList(self.get(name, remote=remote)
                            for name in names)
 
@@ -690,20 +850,90 @@ class COCODataArchive(_td.StrList):
         self._download(names[0])
         return full_name
 
-    def _download(self, name):
-        """create full local path and download single dataset"""
+    def _download(self, name, save=True):
+        """create full local path and download single dataset.
+
+        An interrupted download remains as ``.part`` file and is resumed
+        on the next call. The data file appears only after its hash has
+        been verified.
+        """
         url = '/'.join((self.remote_data_path, name))
         full_name = self.full_path(name)
         _makedirs(os.path.split(full_name)[0])  # create path if necessary
         self._print("  downloading %s to %s" % (url, full_name))
-        try:
-            _urlretrieve(url, full_name)
-        except BaseException:  # KeyboardInterrupt is a BaseException
-            if os.path.exists(full_name):
-                os.remove(full_name)  # remove partial download
-            raise
+        hash_ = _download_resumable(url, full_name, self._known_hash(name))
+        self._hash_cache.remember(full_name, hash_, save=save)
         self.check_hash(full_name)
 
+    def download(self, names, threads=4):
+        """download all missing data of `names` concurrently.
+
+        `names` is a `list` of names in the archive, data which are already
+        present locally are skipped. Use at most `threads` concurrent
+        downloads. Failed downloads are reported with a single exception
+        after all other downloads have finished.
+
+        Return a `list` (`StrList`) of the full pathnames of `names`.
+
+        >>> import os, shutil, tempfile
+        >>> from cocopp import archiving
+        >>> from cocopp.test import serve_folder
+        >>> remote, local = tempfile.mkdtemp(), tempfile.mkdtemp()
+        >>> for name in ['a.tgz', 'b.tgz']:
+        ...     with open(os.path.join(remote, name), 'wb') as f:
+        ...         _ = f.write(os.urandom(1000))
+        >>> url, server = serve_folder(remote)
+        >>> definitions = [('_url_', url), ('a.tgz', 64 * '0', 1),  # wrong hash
+        ...     ('b.tgz', archiving._hash(os.path.join(remote, 'b.tgz')), 1),
+        ...     ('c.tgz', 64 * '0', 1)]  # missing remotely
+        >>> with open(os.path.join(local, archiving.default_definition_filename), 'wt') as f:
+        ...     _ = f.write(repr(definitions))
+        >>> arch = archiving.COCODataArchive(local)
+        >>> arch._print = lambda *args: None
+        >>> arch.download(['a.tgz', 'b.tgz', 'c.tgz'])
+        Traceback (most recent call last):
+        ...
+        ValueError: 2 of 3 downloads failed:
+           a.tgz: wrong checksum for download
+           c.tgz: HTTP Error 404: File not found
+        >>> [os.path.exists(arch.full_path(name)) for name in arch]
+        [False, True, False]
+        >>> arch.download(['b.tgz']) == [arch.full_path('b.tgz')]
+        True
+        >>> server.shutdown()
+        >>> shutil.rmtree(remote); shutil.rmtree(local)
+
+        """
+        names = list(names)
+        missing = [name for name in sorted(set(names), key=names.index)
+                   if not os.path.exists(self.full_path(name))]
+        def download(name):
+            try:
+                self._download(name, save=False)
+            except Exception as e:
+                return name, e
+            return name, None
+        if threads > 1 and len(missing) > 1:
+            pool = ThreadPool(min(threads, len(missing)))
+            try:
+                results = pool.map(download, missing)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [download(name) for name in missing]
+        if missing:
+            self._hash_cache.save()
+        errors = [(name, e) for name, e in results if e is not None]
+        if len(errors) == 1:
+            raise errors[0][1]
+        if errors:
+            raise ValueError('%d of %d downloads failed:\n   %s' % (
+                len(errors), len(missing), '\n   '.join(
+                    '%s: %s' % (name, str(e).strip().split('\n')[0])
+                    for name, e in errors)))
+        return _td.StrList(self.full_path(name) for name in names)
+
     def get_one(self, *args, **kwargs):
         """deprecated, for backwards compatibility only, use `get` instead
         """
@@ -724,26 +954,26 @@ class COCODataArchive(_td.StrList):
         "." matches any single character and ".*" matches any number >= 0 of
         characters).
 
+        Missing data of all matches are downloaded concurrently with
+        `download` before the paths are collected.
         """
         res = []
         args = _str_to_list(args)
+        if remote:  # download all matching missing data concurrently first
+            names = [found for name in (name.strip() for name in args)
+                     if not os.path.exists(name)
+                     for found in self._matching_names(name)]
+            if len(names) > 1:
+                self.download(names)
         for name in args:
             name = name.strip()
             if os.path.exists(name):
                 res.append(name)
                 continue
             for try_ in range(2):
-                more = []
-                if name.endswith('!'):  # take first match
-                    more.append(self.get_first([name[:-1]], remote=remote))
-                elif name.endswith('*'):  # take all matches
-                    more.extend(self.get_all(name[:-1], remote=remote))
-                elif '*' in name:  # use find which also handles regular expressions
-                    more.extend(self.get(found, remote=remote)
-                                for found in self.find(name))
-                elif self.find(name):  # get will bail out if there is not exactly one match
-                    more.append(self.get(name, remote=remote))
-                if more and more[-1] is not None:
+                more = [self.get(found, remote=remote)
+                        for found in self._matching_names(name)]
+                if more:
                     if try_ == 1:
                         print('2nd try succeeded')
                     break
@@ -767,6 +997,21 @@ class COCODataArchive(_td.StrList):
             # and otherwise raise a ValueError
         return res
 
+    def _matching_names(self, name):
+        """return the archive names matching the `get_extended` argument `name`.
+
+        Raise a `ValueError` if `name` has several matches without asking
+        for the first or all of them.
+        """
+        if name.endswith('!'):  # take first match
+            return self.find(name[:-1])[:1]
+        if name.endswith('*'):  # take all matches
+            return self.find(name[:-1])
+        names = self.find(name)  # find also handles regular expressions
+        if len(names) > 1 and '*' not in name:
+            self.get(name, remote=False)  # raises the multiple matches error
+        return names
+
     def _name(self, full_path):
         """return supposed name of full_path or name without any checks"""
         assert self.local_data_path
@@ -817,12 +1062,24 @@ class COCODataArchive(_td.StrList):
                           'COCODataArchive' % name)
         return name
 
-    def consistency_check_data(self):
+    def consistency_check_data(self, threads=8):
         """basic quick consistency check of downloaded data.
 
+        The hashes of the data are computed with `threads` threads, unless
+        they are already known from the hash cache.
+
         return ``(number_of_checked_data, number_of_all_data)``
         """
-        for name in self.downloaded:
+        names = self.downloaded
+        if threads > 1 and len(names) > 1:
+            pool = ThreadPool(min(threads, len(names)))
+            try:
+                pool.map(lambda name: self._hash(name, save=False), names)
+            finally:
+                pool.close()
+                pool.join()
+                self._hash_cache.save()
+        for name in names:
             self.check_hash(name)
         self._checked_consistency = True
         return len(self.downloaded), len(self)
@@ -857,9 +1114,10 @@ class COCODataArchive(_td.StrList):
                 '' % (name, self.local_data_path, str(self.remote_data_path),
                 self.full_path(name)))
 
-    def _hash(self, name, hash_function=hashlib.sha256):
-        """compute hash of `name` or path"""
-        return _hash(self.full_path(name) if name in self else name)
+    def _hash(self, name, hash_function=hashlib.sha256, save=True):
+        """compute hash of `name` or path, memorized in the hash cache"""
+        return self._hash_cache.hash(self.full_path(name) if name in self else name,
+                                     hash_function, save)
 
     def _known_hash(self, name):
         """return known hash or `None`
@@ -22,14 +22,21 @@ from __future__ import print_function
 
 import os
 import sys
+import json
+import hashlib
 import pickle
-import gzip
+import tempfile
 import warnings
 import numpy as np
 import tarfile
 from six import advance_iterator
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 
-from . import readalign, pproc
+from . import readalign, pproc, archiving, datasetcache
+from ._version import __version__
 from .toolsdivers import print_done
 from .ppfig import Usage
 from . import toolsstats, toolsdivers, testbedsettings, genericsettings
@@ -37,6 +44,12 @@ from .pproc import DataSet
 
 bestAlgorithmEntries = {}
 
+store_version = 1
+"""version of the reference algorithm store format, increment to invalidate all stores"""
+
+store_folder = os.path.join(archiving.cocopp_home, 'reference-algorithms')
+"""folder of the stores written when a reference algorithm is parsed"""
+
 algs2009 = ("ALPS", "AMALGAM", "BAYEDA", "BFGS", "Cauchy-EDA", "BIPOP-CMA-ES",
             "CMA-ESPLUSSEL", "DASA", "DE-PSO", "DIRECT", "EDA-PSO",
             "FULLNEWUOA", "G3PCX", "GA", "GLOBAL", "iAMALGAM",
@@ -147,64 +160,24 @@ class BestAlgSet(DataSet):
         sortedAlgs = list(dict_alg.keys())
         # algorithms will be sorted along sortedAlgs which is now a fixed list
 
-        # Align ERT
+        # Align ERT, data sets without any reached target are not aligned
+        aligned_algs = [i for i in sortedAlgs if len(dict_alg[i].target)]
         erts = list(np.transpose(np.vstack([dict_alg[i].target, dict_alg[i].ert]))
-                    for i in sortedAlgs)
-        res = readalign.alignArrayData(readalign.HArrayMultiReader(erts))
-
-        resalgs = []
-        reserts = []
-        instance_numbers = []
-        # For each function value
-        for i in res:
-            # Find best algorithm
-            curerts = i[1:]
-            assert len((np.isnan(curerts) == False)) > 0
-            currentbestert = np.inf
-            currentbestalg = ''
-            for j, tmpert in enumerate(curerts):
-                if np.isnan(tmpert):
-                    continue  # TODO: don't disregard these entries
-                if tmpert == currentbestert:
-                    # TODO: what do we do in case of ties?
-                    # look at function values corresponding to the ERT?
-                    # Look at the function evaluations? the success ratio?
-                    pass
-                elif tmpert < currentbestert:
-                    currentbestert = tmpert
-                    currentbestalg = sortedAlgs[j]
-            reserts.append(currentbestert)
-            resalgs.append(currentbestalg)
-            sorted_instance_numbers = list(set(dict_alg[currentbestalg].instancenumbers))
-            sorted_instance_numbers.sort()
-            instance_numbers.append(sorted_instance_numbers)
-
-        dictiter = {}
-        dictcurLine = {}
-        resDataSet = []
+                    for i in aligned_algs)
+        res = readalign.align_array_data_vectorized(readalign.HArrayMultiReader(erts))
+
+        # Find best algorithm for each function value
+        # TODO: what do we do in case of ties? We take the first algorithm.
+        ibest, reserts = _best_columns(res[:, 1:])
+        resalgs = [aligned_algs[j] for j in ibest]
+        instance_numbers = _instance_numbers_rows(dict_alg, resalgs)
 
         # write down the #fevals to reach the function value.
-        for funval, alg in zip(res[:, 0], resalgs):
-            it = dictiter.setdefault(alg, iter(dict_alg[alg].evals))  # TODO: do we want evals_appended here?
-            curLine = dictcurLine.setdefault(alg, np.array([np.inf, 0]))
-            while curLine[0] > funval:
-                try:
-                    curLine = advance_iterator(it)
-                except StopIteration:
-                    break
-            dictcurLine[alg] = curLine.copy()
-            tmp = curLine.copy()
-            tmp[0] = funval
-            resDataSet.append(tmp)
+        resDataSet = _evals_rows(dict_alg, resalgs, res[:, 0])
 
         setalgs = set(resalgs)
-        dictFunValsNoFail = {}
-        for alg in setalgs:
-            for curline in dict_alg[alg].funvals:
-                if (curline[1:] == dict_alg[alg].finalfunvals).any():
-                    # only works because the funvals are monotonous
-                    break
-            dictFunValsNoFail[alg] = curline.copy()
+        dictFunValsNoFail = dict((alg, _funvals_no_fail(dict_alg[alg]))
+                                 for alg in setalgs)
 
         self._evals = resDataSet
         # evals is not a np array but a list of arrays because they may not
@@ -224,7 +197,7 @@ class BestAlgSet(DataSet):
             self.comment = 'Combination of ' + ', '.join(sortedAlgs)
         else:
             self.comment = dict_alg[sortedAlgs[0]].comment.lstrip('%% ')
-        self._ert = np.array(reserts)
+        self._ert = reserts
         self._target = res[:, 0]
         self.suite = dict_alg[sortedAlgs[0]].suite_name
         self.used_algorithms = sortedAlgs
@@ -236,6 +209,80 @@ class BestAlgSet(DataSet):
         self.bestfinalfunvals = bestfinalfunvals
         self.algbestfinalfunvals = algbestfinalfunvals
 
+    def add_algorithm(self, alg, dataset):
+        """add the data of algorithm `alg` from `DataSet` `dataset`.
+
+        The ERTs of `dataset` are aligned with the ERTs of ``self`` as if
+        ``self`` was a single algorithm. Only the rows where `alg` has a
+        smaller ERT are taken from `dataset`, all other rows are taken
+        from ``self``. Hence, adding an algorithm to a reference algorithm
+        does not need the data of all previous algorithms. The result is
+        the same as from a `BestAlgSet` of all algorithms, where `alg` is
+        the last, bar the alignment of function values below ``2e-12``.
+        """
+        if (dataset.funcId, dataset.dim) != (self.funcId, self.dim):
+            raise ValueError('%s is not on f%d %d-D' % (str(dataset), self.funcId, self.dim))
+        self.used_algorithms = list(self.used_algorithms) + [alg]
+        self.comment = 'Combination of ' + ', '.join(self.used_algorithms)
+        if np.median(dataset.finalfunvals) < np.median(self.bestfinalfunvals):
+            self.bestfinalfunvals = dataset.finalfunvals
+            self.algbestfinalfunvals = alg
+        if not len(dataset.target):  # alg did not reach any target
+            return
+        nb_rows = len(self._evals)
+        erts = [np.transpose(np.vstack([self.target, self.ert])),
+                np.transpose(np.vstack([dataset.target, dataset.ert]))]
+        res = readalign.align_array_data_vectorized(readalign.HArrayMultiReader(erts))
+        ibest, reserts = _best_columns(res[:, 1:])
+        is_new = ibest == 1
+        # rows of self for the other function values, like in _evals_rows
+        rows = np.maximum.accumulate(np.minimum(pproc._first_rows_reaching(
+            self._target, res[~is_new, 0]), nb_rows - 1))
+        new_evals = iter(_evals_rows({alg: dataset}, [alg] * sum(is_new), res[is_new, 0]))
+        old_rows = iter(rows)
+        instances = sorted(set(dataset.instancenumbers))
+        resDataSet, resalgs, instance_numbers, sources = [], [], [], []
+        for funval, new in zip(res[:, 0], is_new):
+            if new:
+                resDataSet.append(advance_iterator(new_evals))
+                resalgs.append(alg)
+                instance_numbers.append(list(instances))
+                sources.append(None)
+            else:
+                k = advance_iterator(old_rows)
+                resDataSet.append(np.array(self._evals[k]))
+                resDataSet[-1][0] = funval
+                resalgs.append(self.best_algorithm_data[k])
+                instance_numbers.append(list(self.instances[k]))
+                sources.append(k)
+
+        # row wise attributes
+        if len(self.algs) == nb_rows:
+            self.algs = [alg if k is None else self.algs[k] for k in sources]
+        else:
+            self.algs = resalgs
+        if len(self.success_ratio) == nb_rows:
+            self.success_ratio = [
+                self.success_ratio[k] if k is not None else
+                [int(np.sum(np.isfinite(line[1:]))), len(line) - 1]
+                for k, line in zip(sources, resDataSet)]
+        self._evals = resDataSet
+        self._ert = reserts
+        self._target = res[:, 0]
+        self.best_algorithm_data = resalgs
+        self.instances = instance_numbers
+
+        # attributes for each best algorithm
+        setalgs = set(resalgs)
+        if alg in setalgs:
+            self._maxevals[alg] = dataset._maxevals
+            self.finalfunvals[alg] = dataset.finalfunvals
+            self.funvalsnofail[alg] = _funvals_no_fail(dataset)
+        for attribute in (self._maxevals, self.finalfunvals, self.funvalsnofail):
+            for key in list(attribute):
+                if key not in setalgs:
+                    del attribute[key]
+
     def __eq__(self, other):
         return (self.__class__ is other.__class__ and
                 self.funcId == other.funcId and
@@ -369,24 +416,232 @@ class BestAlgSet(DataSet):
 
 
 # FUNCTION DEFINITIONS
+def _best_columns(erts):
+    """return for each row of `erts` the column index of the smallest
+    value, the first in case of ties, and the smallest values.
+
+    `nan` values are disregarded, the value is `inf` if all are `nan`.
+
+    >>> import numpy as np
+    >>> from cocopp.bestalg import _best_columns
+    >>> idx, best = _best_columns([[3, np.nan, 2], [1, 1, np.nan]])
+    >>> idx.tolist(), best.tolist()
+    ([2, 0], [2.0, 1.0])
+
+    """
+    erts = np.asarray(erts, dtype=float)
+    erts = np.where(np.isnan(erts), np.inf, erts)
+    idx = erts.argmin(axis=1)
+    return idx, erts[np.arange(len(erts)), idx]
+
+
+def _instance_numbers_rows(dict_alg, algs):
+    """return the sorted instance numbers of ``dict_alg[alg]`` for each
+    `alg` in `algs`"""
+    instances = dict((alg, sorted(set(dict_alg[alg].instancenumbers)))
+                     for alg in set(algs))
+    return [list(instances[alg]) for alg in algs]
+
+
+def _evals_rows(dict_alg, algs, funvals):
+    """return for each `alg` in `algs` the first row of
+    ``dict_alg[alg].evals`` which reaches the respective value in the
+    decreasing `funvals`, or its last row, where the first entry is
+    replaced with the value from `funvals`.
+    """
+    funvals = np.asarray(funvals)
+    res = len(algs) * [None]
+    for alg in set(algs):
+        irows = [i for i, a in enumerate(algs) if a == alg]
+        evals = dict_alg[alg].evals  # TODO: do we want evals_appended here?
+        # like an iterator through evals which stops in the last row
+        idx = np.maximum.accumulate(np.minimum(pproc._first_rows_reaching(
+            evals[:, 0], funvals[irows]), len(evals) - 1))
+        lines = evals[idx]
+        lines[:, 0] = funvals[irows]
+        for i, line in zip(irows, lines):
+            res[i] = line
+    return res
+
+
+def _funvals_no_fail(ds):
+    """return the first row of ``ds.funvals`` where any trial has its
+    final function value, or the last row"""
+    # only works because the funvals are monotonous
+    idx = np.flatnonzero((ds.funvals[:, 1:] == ds.finalfunvals).any(axis=1))
+    return ds.funvals[idx[0] if len(idx) else -1].copy()
+
+
 def reset_reference_algorithm():
     global bestAlgorithmEntries
     bestAlgorithmEntries = {}
 
 
+class ReferenceAlgorithmStore(MutableMapping):
+    """`dict` of `BestAlgSet` instances with ``(dimension, function)``
+    keys, which are read from a store file written by `save_store` when
+    they are accessed for the first time.
+    """
+    def __init__(self, filename, keys, algId=None):
+        self.filename = filename
+        self.algId = algId
+        self._keys = dict.fromkeys(keys)  # an ordered set
+        self._entries = {}
+
+    def __getitem__(self, key):
+        if key not in self._entries:
+            if key not in self._keys:
+                raise KeyError(key)
+            self._entries[key] = _load_store_entry(self.filename, key)
+        return self._entries[key]
+
+    def __setitem__(self, key, value):
+        self._keys[key] = None
+        self._entries[key] = value
+
+    def __delitem__(self, key):
+        del self._keys[key]
+        self._entries.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def store_filenames(best_algo_filename):
+    """return the names of the store files of the reference algorithm
+    data `best_algo_filename`.
+
+    The first is next to `best_algo_filename`, as written by
+    `custom_generate`, the second is in `store_folder`.
+    """
+    name = best_algo_filename.rstrip('/\\')
+    for extension in ('.tar.gz', '.tgz', '.tar', '.zip'):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+            break
+    key = json.dumps([os.path.abspath(best_algo_filename),
+                      __version__, store_version])
+    return [name + '.npz',
+            os.path.join(store_folder, '%s-%s.npz' % (
+                os.path.basename(name),
+                hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]))]
+
+
+def save_store(filename, entries, source=None):
+    """write `entries`, a `dict` of `BestAlgSet` instances as returned by
+    `generate`, into the ``.npz`` file `filename`.
+
+    Each entry is stored in its own members, such that it can be read
+    independently. The store becomes invalid with another cocopp version
+    and, when `source` is given, as soon as the file or folder `source`
+    changes.
+
+    Return `filename` or `None` when the entries cannot be stored.
+    """
+    def json_array(value):
+        return np.frombuffer(json.dumps(value).encode('utf-8'), dtype=np.uint8)
+    keys = sorted((int(d), int(f)) for d, f in entries)
+    members = {}
+    try:
+        for key in keys:
+            arrays = []
+            attributes = datasetcache._encode(vars(entries[key]), arrays)
+            layout, dtypes, buffers = datasetcache.pack_arrays(arrays)
+            name = 'd%d_f%d' % key
+            members[name] = json_array({'attributes': attributes,
+                                        'arrays': layout, 'buffers': dtypes})
+            for i, buffer in enumerate(buffers):
+                members['%s_b%d' % (name, i)] = buffer
+        first = entries[keys[0]] if keys else None
+        members['metadata'] = json_array({
+            'cocopp_version': __version__,
+            'store_version': store_version,
+            'settings': datasetcache.settings_key(),
+            'source': [os.path.abspath(source), datasetcache.file_stamp(source)]
+                      if source else None,
+            'keys': keys,
+            'algId': getattr(first, 'algId', None),
+            'suite_name': getattr(first, 'suite_name', None)})
+    except TypeError:
+        return None
+    folder = os.path.dirname(filename) or '.'
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    # write to a temporary file first, such that concurrent processes
+    # never see an incomplete store
+    handle, tmp_filename = tempfile.mkstemp(suffix='.npz', dir=folder)
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            np.savez(f, **members)
+        getattr(os, 'replace', os.rename)(tmp_filename, filename)
+    except (IOError, OSError):
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        return None
+    return filename
+
+
+def load_store(filename):
+    """return a `ReferenceAlgorithmStore` of the store file `filename` or
+    `None` if the store is missing or outdated.
+
+    Like loading the data themselves, this loads the testbed if none is
+    set.
+    """
+    try:
+        with np.load(filename) as npz:
+            metadata = json.loads(npz['metadata'].tobytes().decode('utf-8'))
+        if (metadata['cocopp_version'] != __version__ or
+                metadata['store_version'] != store_version) or (
+                metadata['source'] and
+                datasetcache.file_stamp(metadata['source'][0]) != metadata['source'][1]):
+            return None
+    except Exception:  # missing or invalid store file
+        return None
+    if not testbedsettings.current_testbed and metadata['suite_name']:
+        testbedsettings.load_current_testbed(metadata['suite_name'], pproc.TargetValues)
+    try:
+        if metadata['settings'] != json.loads(json.dumps(datasetcache.settings_key())):
+            return None
+    except TypeError:
+        return None
+    return ReferenceAlgorithmStore(filename, [tuple(key) for key in metadata['keys']],
+                                   metadata['algId'])
+
+
+def _load_store_entry(filename, key):
+    """return the `BestAlgSet` with ``(dimension, function)`` `key` from
+    the store file `filename`"""
+    name = 'd%d_f%d' % key
+    with np.load(filename) as npz:
+        member = json.loads(npz[name].tobytes().decode('utf-8'))
+        arrays = datasetcache.unpack_arrays(
+            member['arrays'], member['buffers'],
+            [npz['%s_b%d' % (name, i)] for i in range(len(member['buffers']))])
+    entry = BestAlgSet.__new__(BestAlgSet)
+    entry.__dict__.update(datasetcache._decode(member['attributes'], arrays))
+    return entry
+
+
 def load_reference_algorithm(best_algo_filename, force=False, relative_load=True):
     """Assigns :py:data:`bestAlgorithmEntries`.
 
     This function is needed to set the global variable
     :py:data:`bestAlgorithmEntries`. It reads in the data, specified by
-    the string best_algo_filename which can
-    either be a pickled file (deprecated), generated by
-    deprecated_customgenerate or any standard data set (i.e. a zipped or
-    unzipped folder with .info, .dat, and .tdat files such as the ones
-    generated by custom_generate). This function will also set
-    the testbedsettings.current_testbed.reference_algorithm_displayname
+    the string best_algo_filename which can be any standard data set
+    (i.e. a zipped or unzipped folder with .info, .dat, and .tdat files
+    such as the ones generated by custom_generate). This function will
+    also set the testbedsettings.current_testbed.reference_algorithm_displayname
     according to the read data if not already present.
 
+    The data are read from a precomputed store when available, see
+    `store_filenames`, where each entry is read on first access.
+    Otherwise, the data are parsed and, if
+    ``genericsettings.use_dataset_cache``, stored for the next time.
+
     :py:data:`bestAlgorithmEntries` is a dictionary accessed by providing
     a tuple :py:data:`(dimension, function)`. This returns an instance
     of :py:class:`BestAlgSet`.
@@ -404,44 +659,39 @@ def load_reference_algorithm(best_algo_filename, force=False, relative_load=True
         bestAlgorithmEntries = None
         return bestAlgorithmEntries
 
+    if best_algo_filename.endswith('pickle.gz'):
+        raise ValueError("Loading reference algorithms from pickle files is not"
+                         " supported anymore, use `custom_generate` to create"
+                         " reference algorithm data instead of %s" % best_algo_filename)
+
     print("Loading best algorithm data from %s ..." % best_algo_filename)
     sys.stdout.flush()
 
     if relative_load:
         best_alg_file_path = toolsdivers.path_in_package()
-        pickleFilename = os.path.join(best_alg_file_path, best_algo_filename)
     else:
         best_alg_file_path = ''
-        pickleFilename = best_algo_filename
-
-    if pickleFilename.endswith('pickle.gz'):
-        warnings.warn("   !Loading reference algorithms from pickle files deprecated!")
-        
-        # TODO: for backwards compatibility: check whether algorithm is 
-        # actually in pickle format (and not just based on the file ending)
-
-        fid = gzip.open(pickleFilename, 'r')
-        try:
-            bestAlgorithmEntries = pickle.load(fid)
-            # in the deprecated case of loading pickle files, we use the
-            # filename to set reference_algorithm_displayname in testbedsettings
-            # if not present:
-            if testbedsettings.current_testbed:            
-                if hasattr(testbedsettings.current_testbed, 'reference_algorithm_displayname'):
-                    testbedsettings.current_testbed.reference_algorithm_displayname = pickleFilename
-        except:
-            warnings.warn("failed to open file %s" % pickleFilename)
-            # raise  # outcomment to diagnose
-            bestAlgorithmEntries = None
-        fid.close()
+    filename = os.path.join(best_alg_file_path, best_algo_filename)
+
+    store_filename, cache_filename = store_filenames(filename)
+    # with a data filter, the generated entries are incomplete
+    use_cache = (genericsettings.use_dataset_cache and
+                 genericsettings.data_filter is None)
+    bestAlgorithmEntries = load_store(store_filename)
+    if bestAlgorithmEntries is None and use_cache:
+        bestAlgorithmEntries = load_store(cache_filename)
+    if bestAlgorithmEntries is not None:
+        algId = bestAlgorithmEntries.algId
     else:
-        algList = [os.path.join(best_alg_file_path, best_algo_filename)]
-        dsList, sortedAlgs, dictAlg = pproc.processInputArgs(algList)
-        bestAlgorithmEntries = generate(dictAlg, dsList[0].algId)
-        # set reference_algorithm_displayname in testbedsetting if not present:
-        if testbedsettings.current_testbed:
-            if testbedsettings.current_testbed.reference_algorithm_displayname is None:
-                testbedsettings.current_testbed.reference_algorithm_displayname = dsList[0].algId
+        dsList, sortedAlgs, dictAlg = pproc.processInputArgs([filename])
+        algId = dsList[0].algId
+        bestAlgorithmEntries = generate(dictAlg, algId)
+        if use_cache:
+            save_store(cache_filename, bestAlgorithmEntries, source=filename)
+    # set reference_algorithm_displayname in testbedsetting if not present:
+    if testbedsettings.current_testbed:
+        if testbedsettings.current_testbed.reference_algorithm_displayname is None:
+            testbedsettings.current_testbed.reference_algorithm_displayname = algId
 
     print_done()
 
@@ -466,38 +716,27 @@ def generate(dict_alg, algId):
     return res
 
 
-def deprecated_customgenerate(args=algs2009):
-    """Generates best algorithm data set.
-
-    This functionality is deprecated because it writes
-    unsupported pickle files.
+def add_algorithms(reference, dict_alg, algId='Virtual Best Algorithm'):
+    """add the algorithms of `dict_alg` to the `BestAlgSet` values of
+    `reference`, a `dict` as returned by `generate`, and return `reference`.
 
-    It will create a folder bestAlg in the current working directory
-    with a pickle file corresponding to the bestalg dataSet of the
-    algorithms listed in variable args.
-
-    This method is called from the python command line from a directory
-    containing all necessary data folders.
+    Entries of function and dimension pairs not in `reference` are
+    generated from `dict_alg` with name `algId`.
 
+    See also `BestAlgSet.add_algorithm`.
     """
-
-    outputdir = 'bestCustomAlg'
-
-    genericsettings.verbose = True
-    dsList, sortedAlgs, dictAlg = pproc.processInputArgs(args)
-
-    if not os.path.exists(outputdir):
-        os.mkdir(outputdir)
-        if genericsettings.verbose:
-            print('Folder %s was created.' % outputdir)
-
-    res = generate(dictAlg, outputdir)
-    picklefilename = os.path.join(outputdir, 'bestalg.pickle')
-    fid = gzip.open(picklefilename + ".gz", 'w')
-    pickle.dump(res, fid)
-    fid.close()
-
-    print('done with writing pickle...')
+    for f, i in pproc.dictAlgByFun(dict_alg).items():
+        for d, j in pproc.dictAlgByDim(i).items():
+            if (d, f) not in reference:
+                reference[(d, f)] = BestAlgSet(j, algId)
+                continue
+            for alg, dsl in j.items():
+                if len(dsl) != 1:
+                    warnings.warn('Algorithm %s has a problem on f%d %d-D.'
+                                  % (alg, f, d))
+                    continue
+                reference[(d, f)].add_algorithm(alg, dsl[0])
+    return reference
 
 
 def custom_generate(args=algs2009, algId='bestCustomAlg', suite=None):
@@ -506,7 +745,8 @@ def custom_generate(args=algs2009, algId='bestCustomAlg', suite=None):
     It will create a folder named as algId in the current working directory
     corresponding to the bestalg dataSet of the algorithms listed in
     variable args. This folder is furthermore added to a `.tar.gz` file
-    of the same name.
+    of the same name, next to which a precomputed store ``algId.npz`` is
+    written, see `load_reference_algorithm`.
 
     This method is called from the python command line from a directory
     containing all necessary data folders::
@@ -540,6 +780,8 @@ def custom_generate(args=algs2009, algId='bestCustomAlg', suite=None):
     tar = tarfile.open(output_dir + ".tar.gz", "w:gz")
     tar.add(output_dir)
     tar.close()
+    save_store(store_filenames(output_dir + ".tar.gz")[0], result,
+               source=output_dir + ".tar.gz")
 
     print('Best algorithm files were written to %s.tar.gz' % output_dir)
     print('...using instances ', end='')
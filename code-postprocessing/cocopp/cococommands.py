@@ -212,7 +212,7 @@ class DataWithFewSuccesses:
         return len(self.result)
 
 
-def load(filename):
+def load(filename, data_filter=None):
     """[currently broken when further used within `cocopp`, see `load2`] Create a :py:class:`DataSetList` instance from a file or folder.
 
     Input argument filename can be a single :file:`info` file name, a
@@ -220,10 +220,17 @@ def load(filename):
     folder is browsed recursively for :file:`info` or :file:`pickle`
     files.
 
+    `data_filter` is a predicate ``data_filter(funcId, dim)`` to load only
+    part of the data, like ``cocopp.pproc.DataFilter(dimensions=[20, 40])``,
+    by default ``genericsettings.data_filter`` is used.
+
     Details: due to newly implemented side effects when data are read in,
     the returned data set list may not work anymore when used with plotting
     functions of the `cocopp` module, see also `load2`.
     """
+    if data_filter is not None:
+        return _DataSetList(official_archives.all.get_extended(_StringList(filename)),
+                            data_filter=data_filter)
     return _DataSetList(official_archives.all.get_extended(_StringList(filename)))
 
 def load2(args):
@@ -91,12 +91,14 @@ class BBOBNewDataFormat(DataFormat):
                 dataset._evals[:,1:] *= genericsettings.weight_evaluations_constraints[0]
             # (target) f-value rows are not aligned, so we need to find for
             # each evals the respective data row in evals_constraints
-            j, j_max = 0, len(dataset.evals_constraints[:, 0])
-            for i, eval_row in enumerate(dataset._evals):
-                # find j such that target[j] < target[i] (don't rely on floats being equal, though we probably could)
-                while j < j_max and dataset.evals_constraints[j, 0] + 1e-14 > eval_row[0]:
-                    j += 1  # next smaller (target) f-value
-                eval_row[1:] += dataset.evals_constraints[j-1, 1:] * genericsettings.weight_evaluations_constraints[1]
+            # find for each i the first j such that target[j] < target[i]
+            # (don't rely on floats being equal, though we probably could),
+            # both target columns are decreasing
+            j = np.searchsorted(-(dataset.evals_constraints[:, 0] + 1e-14),
+                                -dataset._evals[:, 0])
+            j = np.maximum.accumulate(j)  # j never decreases with i
+            dataset._evals[:, 1:] += (dataset.evals_constraints[j - 1, 1:] *
+                                      genericsettings.weight_evaluations_constraints[1])
             # TODO: not sure this is always what we want, but it is at least consistent with dataset.evals
             return (genericsettings.weight_evaluations_constraints[0] * maxevals +
                     genericsettings.weight_evaluations_constraints[1] * maxevals_cons,
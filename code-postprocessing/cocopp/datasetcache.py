@@ -0,0 +1,245 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""On-disk cache of parsed `pproc.DataSet` instances.
+
+Parsing the ``.info``, ``.dat`` and ``.tdat`` files takes most of the
+time when loading data. The `DataSet` instances parsed from an index
+file are hence stored in a ``.npz`` file in `cache_folder`, where arrays
+are stored as such and all other attributes as JSON text (no pickle).
+
+A cache file is only used when
+
+- it was written with the same cocopp version and `cache_version`,
+- neither the index file nor any of the data files read with it has
+  changed its size or modification time,
+- the settings which affect the parsing, see `settings_key`, are the
+  same, in particular the current testbed.
+
+The cache is used by `pproc.DataSetList` unless
+``genericsettings.use_dataset_cache`` is `False`.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+from six import string_types, integer_types
+
+from . import genericsettings, testbedsettings, dataformatsettings, archiving, findfiles
+from ._version import __version__
+
+cache_version = 1
+"""version of the cache file format, increment to invalidate all files"""
+
+cache_folder = os.path.join(archiving.cocopp_home, 'dataset-cache')
+
+
+def cache_filename(index_file, alg_name=None):
+    """return the cache file name for the `DataSet` instances of `index_file`"""
+    key = json.dumps([os.path.abspath(index_file), alg_name,
+                      __version__, cache_version])
+    return os.path.join(cache_folder,
+                        hashlib.sha256(key.encode('utf-8')).hexdigest() + '.npz')
+
+
+def file_stamp(filename):
+    """return ``[size, mtime]`` of `filename` or `None` if it does not exist.
+
+    For a file in an archive, the modification time of the archive is used.
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return findfiles.member_stamp(filename)
+    return [stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime)]
+
+
+def data_files(ds):
+    """return the names of the files read to create `DataSet` `ds`"""
+    filepath = os.path.split(ds.indexFiles[0])[0]
+    return [os.path.join(filepath, os.path.splitext(name)[0] + extension)
+            for name in ds.dataFiles for extension in ('.dat', '.tdat')]
+
+
+def settings_key():
+    """return the settings which affect the parsing of data files"""
+    testbed = testbedsettings.current_testbed
+    return _encode([type(testbed).__name__,
+                    getattr(testbed, 'number_of_points', None),
+                    getattr(testbed, 'instancesOfInterest', None),
+                    getattr(testbed, 'has_constraints', None),
+                    genericsettings.weight_evaluations_constraints], [])
+
+
+def save(index_file, alg_name, datasets):
+    """write `datasets` parsed from `index_file` into the cache.
+
+    Return the cache file name or `None` when `datasets` contain
+    attributes which cannot be stored.
+    """
+    index_stamp = file_stamp(index_file)
+    if index_stamp is None:
+        return None
+    arrays = []
+    try:
+        encoded = [_encode(vars(ds), arrays) for ds in datasets]
+        settings = settings_key()
+    except TypeError:
+        return None
+    metadata = {'cocopp_version': __version__,
+                'cache_version': cache_version,
+                'files': [[index_file, index_stamp]] + [
+                    [name, file_stamp(name)]
+                    for ds in datasets for name in data_files(ds)],
+                'settings': settings,
+                'suite_name': datasets[0].suite_name if datasets else None,
+                'datasets': encoded}
+    metadata['arrays'], metadata['buffers'], buffers = pack_arrays(arrays)
+    metadata = np.frombuffer(json.dumps(metadata).encode('utf-8'), dtype=np.uint8)
+    filename = cache_filename(index_file, alg_name)
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+    # write to a temporary file first, such that concurrent processes
+    # never see an incomplete cache file
+    handle, tmp_filename = tempfile.mkstemp(suffix='.npz', dir=cache_folder)
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            np.savez(f, metadata=metadata,
+                     **dict(('b%d' % i, b) for i, b in enumerate(buffers)))
+        getattr(os, 'replace', os.rename)(tmp_filename, filename)
+    except (IOError, OSError):
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        return None
+    return filename
+
+
+def load(index_file, alg_name, dataset_class, target_values):
+    """return the cached `list` of `DataSet` instances of `index_file` or
+    `None` if the cache is missing or outdated.
+
+    Like `DataSet.__init__`, this loads the testbed if none is set, using
+    `target_values`, and sets the current data format.
+    """
+    try:
+        with np.load(cache_filename(index_file, alg_name)) as npz:
+            metadata = json.loads(npz['metadata'].tobytes().decode('utf-8'))
+            if (metadata['cocopp_version'] != __version__ or
+                    metadata['cache_version'] != cache_version or
+                    any(file_stamp(name) != stamp
+                        for name, stamp in metadata['files'])):
+                return None
+            arrays = unpack_arrays(metadata['arrays'], metadata['buffers'],
+                                   [npz['b%d' % i] for i in range(len(metadata['buffers']))])
+    except Exception:  # missing or invalid cache file
+        return None
+    if not testbedsettings.current_testbed and metadata['suite_name']:
+        testbedsettings.load_current_testbed(metadata['suite_name'], target_values)
+    try:
+        if metadata['settings'] != json.loads(json.dumps(settings_key())):
+            return None
+    except TypeError:
+        return None
+    datasets = []
+    for attributes in metadata['datasets']:
+        ds = dataset_class.__new__(dataset_class)
+        ds.__dict__.update(_decode(attributes, arrays))
+        datasets.append(ds)
+    if datasets:
+        dataformatsettings.current_data_format = \
+            dataformatsettings.data_format_name_to_class_mapping[
+                datasets[-1].get_data_format()]()
+    return datasets
+
+
+def clear():
+    """remove all cache files"""
+    if os.path.exists(cache_folder):
+        for name in os.listdir(cache_folder):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(cache_folder, name))
+
+
+def pack_arrays(arrays):
+    """return ``(layout, dtypes, buffers)`` to store `arrays` in few buffers.
+
+    Reading many small arrays from a ``.npz`` file is slow, hence all
+    arrays of the same dtype are concatenated into a single buffer. The
+    JSON serializable `layout` and `dtypes` are needed to recover the
+    arrays with `unpack_arrays`.
+    """
+    buffers, sizes, layout = {}, {}, []
+    for a in arrays:
+        dtype = a.dtype.str
+        layout.append([dtype, a.shape, sizes.get(dtype, 0)])
+        buffers.setdefault(dtype, []).append(a.ravel())
+        sizes[dtype] = sizes.get(dtype, 0) + a.size
+    dtypes = sorted(buffers)
+    return layout, dtypes, [np.concatenate(buffers[dtype]) for dtype in dtypes]
+
+
+def unpack_arrays(layout, dtypes, buffers):
+    """return the `list` of arrays packed with `pack_arrays`"""
+    buffers = dict(zip(dtypes, buffers))
+    arrays = []
+    for dtype, shape, offset in layout:
+        size = int(np.prod(shape))
+        arrays.append(buffers[dtype][offset:offset + size].reshape(shape).copy())
+    return arrays
+
+
+def _encode(value, arrays):
+    """return a JSON serializable version of `value`.
+
+    Arrays are appended to `arrays` and replaced by their index. Raise
+    `TypeError` if `value` contains an unsupported type.
+
+    >>> import json
+    >>> import numpy as np
+    >>> from cocopp.datasetcache import _encode, _decode
+    >>> arrays = []
+    >>> value = {1: (2., [np.float64(3), None]), 'a': np.arange(3)}
+    >>> text = json.dumps(_encode(value, arrays))
+    >>> decoded = _decode(json.loads(text), arrays)
+    >>> decoded[1] == value[1], type(decoded[1][1][0]), decoded['a'] is arrays[0]
+    (True, <class 'numpy.float64'>, True)
+
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("cannot cache object arrays")
+        arrays.append(value)
+        return {'__array__': len(arrays) - 1}
+    if isinstance(value, np.generic):
+        return {'__numpy__': [value.dtype.str, value.item()]}
+    if type(value) is list:
+        return [_encode(v, arrays) for v in value]
+    if type(value) is tuple:
+        return {'__tuple__': [_encode(v, arrays) for v in value]}
+    if type(value) is dict:
+        return {'__dict__': [[_encode(k, arrays), _encode(v, arrays)]
+                             for k, v in value.items()]}
+    if value is None or isinstance(value, (bool, float) + string_types + integer_types):
+        return value
+    raise TypeError("cannot cache %s" % str(type(value)))
+
+
+def _decode(value, arrays):
+    """inverse of `_encode`"""
+    if type(value) is list:
+        return [_decode(v, arrays) for v in value]
+    if type(value) is dict:
+        if '__array__' in value:
+            return arrays[value['__array__']]
+        if '__numpy__' in value:
+            dtype, item = value['__numpy__']
+            return np.dtype(dtype).type(item)
+        if '__tuple__' in value:
+            return tuple(_decode(v, arrays) for v in value['__tuple__'])
+        return dict((_decode(k, arrays), _decode(v, arrays))
+                    for k, v in value['__dict__'])
+    return value
@@ -11,11 +11,21 @@ This module can be called from the shell, it will recursively look for
 
 displays found (extracted) files.
 
+Files in tar and zip archives are not extracted (unless
+``genericsettings.extract_archives``) but addressed by the path of the
+archive file joined with the member name, like
+``'data/BIPOP.tgz/BIPOP/bbobexp_f2.info'``, and read with `open_member`
+by an `ArchiveReader`.
+
 TODO: we do not use pickle files anymore.
 """
 from __future__ import absolute_import, division, print_function
+import io
 import os
+import re
 import sys
+import posixpath
+import threading
 import warnings
 import tarfile
 import zipfile
@@ -48,15 +58,255 @@ def is_recognized_repository_filetype2(filename):
             )
 
 
-def main(directory='.'):
-    """Lists "data" files recursively in a given directory, tar files
-    are extracted.
+def function_dimension(filename):
+    """return ``(funcId, dim)`` as found in `filename` or `None` instead.
+
+    >>> from cocopp.findfiles import function_dimension
+    >>> function_dimension('data_f12/bbobexp_f12_DIM40.tdat')
+    (12, 40)
+    >>> function_dimension('best2009/bbob-bestalg_f01_d02.dat')
+    (1, 2)
+    >>> function_dimension('bbobexp_f3.info'), function_dimension('bbob.info')
+    ((3, None), (None, None))
+
+    """
+    name = os.path.basename(filename.replace('\\', '/'))
+    res = []
+    for pattern in (_function_pattern, _dimension_pattern):
+        found = pattern.findall(name)
+        res.append(int(found[-1]) if found else None)
+    return tuple(res)
+
+_function_pattern = re.compile(r'_f(\d+)(?=[_.])')
+_dimension_pattern = re.compile(r'_(?:DIM|d)(\d+)(?=[_.])')
+
+def _passes(data_filter, filename):
+    """return ``data_filter(funcId, dim)`` with values taken from `filename`"""
+    return data_filter is None or data_filter(*function_dimension(filename))
+
+def _member_name(name):
+    """return normalized archive member `name` with ``/`` as separator"""
+    return posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+
+class ArchiveReader(object):
+    """read members of a tar or zip archive file without extracting it.
+
+    Members of a compressed tar file can not be accessed at random
+    without decompressing the archive up to the member. Hence they are
+    read in a single forward pass, which is only restarted if a member
+    is requested again. Members which are passed over while looking
+    for the requested one are kept in memory until they are read, if
+    they are data files (:file:`info`, :file:`dat` or :file:`tdat`)
+    whose function and dimension in the name pass `data_filter`.
+    """
+    data_extensions = ('.info', '.dat', '.tdat')
+
+    def __init__(self, filename, data_filter=None):
+        self.filename = os.path.abspath(filename)
+        self.data_filter = data_filter
+        stat = os.stat(self.filename)
+        self.stamp = (stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime))
+        self._lock = threading.RLock()
+        self._cache = {}  # content of passed members to be read
+        self._consumed = set()  # members which were read before
+        self._stream = None  # (TarFile, member iterator) of the current pass
+        self._open()
+        self.members = {}  # normalized name: name in the archive
+        self.sizes = {}
+        self._names = []  # normalized names in archive order
+        if self._zip is not None:
+            for info in self._zip.infolist():
+                if not info.filename.endswith('/'):
+                    self._add(info.filename, info.file_size)
+        else:  # keep info files, which are read first anyway
+            with tarfile.open(self.filename, 'r|*') as tar:
+                for member in tar:
+                    if member.isfile():
+                        name = self._add(member.name, member.size)
+                        if name.endswith('.info') and self._wanted(name):
+                            self._cache[name] = tar.extractfile(member).read()
+
+    def _add(self, member_name, size):
+        name = _member_name(member_name)
+        if name not in self.members:
+            self._names.append(name)
+        self.members[name] = member_name
+        self.sizes[name] = size
+        return name
+
+    def _open(self):
+        """(re)open the archive file, needed in a new process"""
+        self._pid = os.getpid()
+        self._stream = None
+        self._zip = zipfile.ZipFile(self.filename) if zipfile.is_zipfile(
+            self.filename) else None
+
+    def _wanted(self, name):
+        return (name.endswith(self.data_extensions) and
+                name not in self._consumed and _passes(self.data_filter, name))
+
+    def names(self):
+        """return all member names in the order of the archive"""
+        return list(self._names)
+
+    def read(self, name):
+        """return the content of member `name` as `bytes`"""
+        name = _member_name(name)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            if name not in self.members:
+                raise IOError(2, 'The file "%s" does not exist in archive "%s".'
+                              % (name, self.filename))
+            self._consumed.add(name)
+            if name in self._cache:
+                return self._cache.pop(name)
+            if self._zip is not None:
+                return self._zip.read(self.members[name])
+            for _ in range(2):  # restart once from the beginning
+                if self._stream is None:
+                    tar = tarfile.open(self.filename, 'r|*')
+                    self._stream = tar, iter(tar)
+                tar, members = self._stream
+                for member in members:
+                    if not member.isfile():
+                        continue
+                    member_name = _member_name(member.name)
+                    if member_name == name:
+                        return tar.extractfile(member).read()
+                    if self._wanted(member_name) and member_name not in self._cache:
+                        self._cache[member_name] = tar.extractfile(member).read()
+                tar.close()
+                self._stream = None
+            raise IOError(2, 'Could not read "%s" from archive "%s".'
+                          % (name, self.filename))
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+def archive_reader(filename, data_filter=None):
+    """return the `ArchiveReader` of archive `filename`, created only once.
+
+    The reader is created anew when the archive file has changed.
+    `data_filter` replaces the filter of an existing reader if given.
+    """
+    filename = os.path.abspath(filename)
+    stat = os.stat(filename)
+    with _readers_lock:
+        reader = _readers.get(filename)
+        if reader is None or reader.stamp != (
+                stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime)):
+            reader = _readers[filename] = ArchiveReader(filename, data_filter)
+        elif data_filter is not None:
+            reader.data_filter = data_filter
+    return reader
+
+def archive_member(path):
+    """return ``(archive_filename, member_name)`` if `path` is in an archive.
+
+    Return `None` otherwise, in particular when `path` exists in the
+    file system.
+    """
+    if not any(ext in path for ext in ('.tar', '.tgz', '.zip')) or os.path.exists(path):
+        return None
+    head, tail = os.path.split(os.path.normpath(path))
+    member = [tail]
+    while head and tail:
+        if os.path.isfile(head) and is_recognized_repository_filetype2(head):
+            return head, '/'.join(reversed(member))
+        head, tail = os.path.split(head)
+        member.append(tail)
+    return None
+
+def isfile(path):
+    """return `True` if `path` is a file, possibly in an archive"""
+    if os.path.isfile(path):
+        return True
+    found = archive_member(path)
+    return found is not None and _member_name(found[1]) in archive_reader(found[0]).members
+
+def member_stamp(path):
+    """return ``[size, mtime]`` of archive member `path` or `None`.
+
+    The modification time is the one of the archive file.
+    """
+    found = archive_member(path)
+    if found is None:
+        return None
+    reader = archive_reader(found[0])
+    name = _member_name(found[1])
+    if name not in reader.sizes:
+        return None
+    return [reader.sizes[name], reader.stamp[1]]
+
+def open_member(path, **kwargs):
+    """return the archive member `path` opened as text file or `None`.
+
+    `kwargs` are passed to `io.TextIOWrapper`, like ``errors='replace'``.
+    """
+    found = archive_member(path)
+    if found is None:
+        return None
+    return io.TextIOWrapper(io.BytesIO(archive_reader(found[0]).read(found[1])),
+                            **kwargs)
+
+def _archive_files(directory, data_filter=None):
+    """return the paths of the :file:`info` files in `directory` which is
+    or is in an archive.
+
+    Pickle files are only listed from folders, as they are not read from
+    archives.
+
+    >>> import os, shutil, tarfile, tempfile
+    >>> from cocopp import findfiles
+    >>> folder = tempfile.mkdtemp()
+    >>> os.makedirs(os.path.join(folder, 'alg', 'data_f1'))
+    >>> for name in ['bbobexp_f1.info', 'bbobexp_f1.pickle', 'data_f1/bbobexp_f1_DIM2.dat']:
+    ...     open(os.path.join(folder, 'alg', name), 'w').close()
+    >>> with tarfile.open(os.path.join(folder, 'alg.tgz'), 'w:gz') as tar:
+    ...     tar.add(os.path.join(folder, 'alg'), 'alg')
+    >>> [os.path.relpath(name, folder) for name in
+    ...  findfiles._archive_files(os.path.join(folder, 'alg.tgz'))]
+    ['alg.tgz/alg/bbobexp_f1.info']
+    >>> shutil.rmtree(folder)
+
+    """
+    if os.path.isfile(directory):
+        archive, folder = directory, ''
+    else:
+        archive, folder = archive_member(directory)
+    folder = _member_name(folder).strip('.') if folder else ''
+    reader = archive_reader(archive, data_filter)
+    return [os.path.join(archive, *name.split('/'))
+            for name in reader.names()
+            if name.endswith('.info')
+            and (not folder or name == folder or name.startswith(folder + '/'))
+            and _passes(data_filter, name)]
+
+def main(directory='.', data_filter=None):
+    """Lists "data" files recursively in a given directory or archive.
 
     The "data" files have :file:`info` and :file:`pickle` extensions.
 
-    TODO: not only recognize .tar and .tar.gz and .tgz but .zip...
+    Data in tar or zip archives are listed with paths into the archive,
+    see `archive_member`, where only :file:`info` files are listed, unless ``genericsettings.extract_archives``,
+    in which case the archive is extracted into a folder first.
 
+    `data_filter` is a function ``data_filter(funcId, dim)``, which
+    skips files whose name has a function and/or dimension for which
+    the returned value is `False`. Values not found in the file name
+    are passed as `None`.
     """
+    directory = directory.strip()
+    if not genericsettings.extract_archives and (
+            is_recognized_repository_filetype2(directory) and os.path.isfile(directory)
+            or archive_member(directory)):
+        file_list = _archive_files(directory, data_filter)
+        if genericsettings.verbose:
+            print('Found %d file(s) in %s.' % (len(file_list), directory))
+        if not file_list:
+            warnings.warn('Could not find any file of interest in %s!' % directory)
+        return file_list
 
     file_list = list()
     root = ''
@@ -68,7 +318,8 @@ def main(directory='.'):
             print('Searching in %s ...' % root)
 
         for elem in files:
-            if elem.endswith('.info') or elem.endswith('.pickle') or elem.endswith('.pickle.gz'):
+            if ((elem.endswith('.info') or elem.endswith('.pickle') or elem.endswith('.pickle.gz'))
+                    and _passes(data_filter, elem)):
                 file_list.append(os.path.join(root, elem))
 
     if genericsettings.verbose:
@@ -215,6 +215,7 @@ ppfigdim_file_name = 'ppfigdim'
 latex_commands_for_html = 'latex_commands_for_html'
 
 extraction_folder_prefix = '.extracted_'
+extract_archives = False  # extract tar/zip data archives into a folder with the above prefix instead of reading them directly
 
 # default settings for rungeneric, rungeneric1 and rungenericmany
 inputCrE = 0.
@@ -224,6 +225,9 @@ isNoisy = False
 isNoiseFree = False
 isConv = False
 verbose = False
+loading_workers = 1  # number of processes to load data files with, 0 or None uses all cores
+use_dataset_cache = True  # store parsed data files on disk, see datasetcache.py
+data_filter = None  # load only data for which data_filter(funcId, dim) is True, see pproc.DataFilter
 outputdir = 'ppdata'
 inputsettings = 'color'
 isExpensive = False
@@ -29,6 +29,7 @@ import json
 import hashlib
 import functools
 import collections
+import multiprocessing
 from pdb import set_trace
 from six import string_types, advance_iterator
 import numpy, numpy as np
@@ -36,16 +37,29 @@ import matplotlib.pyplot as plt
 from collections import OrderedDict
 from . import genericsettings, findfiles, toolsstats, toolsdivers
 from . import testbedsettings, dataformatsettings
-from .readalign import split, align_data, HMultiReader, VMultiReader, openfile
+from .readalign import split, align_data_vectorized, HMultiReader, VMultiReader, openfile
 from .readalign import HArrayMultiReader, VArrayMultiReader, alignArrayData
 from .ppfig import consecutiveNumbers, Usage
-from . import archiving
+from . import archiving, datasetcache
 
 do_assertion = genericsettings.force_assertions # expensive assertions
 targets_displayed_for_info = [10, 1., 1e-1, 1e-3, 1e-5, 1e-8]  # only to display info in DataSetList.info
 maximal_evaluations_only_to_last_target = False  # was true in release 13.03, leads naturally to better results
 
 
+def _first_rows_reaching(decreasing_values, targets):
+    """return for each target the index of the first of the
+    `decreasing_values` which is ``<= target``, or
+    ``len(decreasing_values)`` if there is none.
+
+    >>> from cocopp.pproc import _first_rows_reaching
+    >>> _first_rows_reaching([1e2, 1, 1, 1e-2], [10, 1, 1e-3, 1e3]).tolist()
+    [1, 1, 4, 0]
+
+    """
+    return np.searchsorted(-np.asarray(decreasing_values, dtype=float),
+                           -np.asarray(targets, dtype=float), side='left')
+
 def _DataSet_complement_data(self, step=10**0.2, final_target=1e-8):
     """insert a line for each target value, never used (detEvals(targets) does the job on the fly).
 
@@ -754,7 +768,7 @@ class DataSet(object):
                     suite = testbedsettings.default_suite_single
         return suite
 
-    def __init__(self, header, comment, data, indexfile):
+    def __init__(self, header, comment, data, indexfile, instances=None):
         """Instantiate a DataSet.
 
         The first three input arguments correspond to three consecutive
@@ -765,6 +779,9 @@ class DataSet(object):
         :keyword string data: information on the runs of the experiment
         :keyword string indexfile: string for the file name from where
                                    the information come
+        :keyword list instances: if given, only these instances are
+                                 loaded, in addition to the restriction
+                                 to ``instancesOfInterest`` of the testbed
 
     """
         # Extract information from the header line.
@@ -808,6 +825,11 @@ class DataSet(object):
         if not testbedsettings.current_testbed:
             testbedsettings.load_current_testbed(self.suite_name, TargetValues)
 
+        instances_of_interest = testbedsettings.current_testbed.instancesOfInterest or None
+        if instances is not None:
+            instances_of_interest = [i for i in instances if instances_of_interest is None
+                                     or i in instances_of_interest]
+
         # Split line in data file name(s) and run time information.
         parts = data.split(', ')
         idx_of_instances_to_load = []
@@ -836,11 +858,11 @@ class DataSet(object):
                     
                     # We might take only a subset of the given instances,
                     # given in testbedsettings.current_testbed.instancesOfInterest:
-                    if testbedsettings.current_testbed.instancesOfInterest:
+                    if instances_of_interest is not None:
                         instance = ast.literal_eval(elem)
 
                         # If this is the best algorithm then the instance number is 0.
-                        if instance > 0 and instance not in testbedsettings.current_testbed.instancesOfInterest:
+                        if instance > 0 and instance not in instances_of_interest:
                             idx_of_instances_to_load.append(False)
                             continue
 
@@ -861,11 +883,11 @@ class DataSet(object):
                     itrial, info = elem.split(':', 1)
                     # We might take only a subset of the given instances,
                     # given in testbedsettings.current_testbed.instancesOfInterest:
-                    if testbedsettings.current_testbed.instancesOfInterest:
+                    if instances_of_interest is not None:
                         instance = ast.literal_eval(itrial)
 
                         # If this is the best algorithm then the instance number is 0.
-                        if instance > 0 and instance not in testbedsettings.current_testbed.instancesOfInterest:
+                        if instance > 0 and instance not in instances_of_interest:
                             idx_of_instances_to_load.append(False)
                             continue
 
@@ -893,7 +915,7 @@ class DataSet(object):
             # this takes different data formats into account to compute
             # the _evals attribute and others into self:
             maxevals, finalfunvals = dataformatsettings.current_data_format.align_data_into_evals(
-                                                align_data, data, self)
+                                                align_data_vectorized, data, self)
             # CAVEAT: maxevals may not be f-evaluations only
             # TODO: the above depends implicitely (in readalign.align_data)
             # on the global variable setting of
@@ -918,7 +940,7 @@ class DataSet(object):
         dataFiles = list(os.path.join(filepath, os.path.splitext(i)[0] + '.tdat')
                          for i in self.dataFiles)
                              
-        if not any(os.path.isfile(dataFile) for dataFile in dataFiles):
+        if not any(findfiles.isfile(dataFile) for dataFile in dataFiles):
             warnings.warn("Missing tdat files in '%s'. Please consider to rerun the experiments." % filepath)
 
         datasets, algorithms, reference_values, success_ratio = split(dataFiles, idx_to_load=idx_of_instances_to_load)
@@ -928,7 +950,7 @@ class DataSet(object):
                    % (dataFiles, len(data), len(self.instancenumbers)))
         
         if data:
-            self.funvals, maxevals, finalfunvals = align_data(
+            self.funvals, maxevals, finalfunvals = align_data_vectorized(
                 data, 
                 dataformatsettings.current_data_format.evaluation_idx,
                 dataformatsettings.current_data_format.function_value_idx,
@@ -1555,23 +1577,13 @@ class DataSet(object):
         """
         res = {}
         # expect evals to be sorted by decreasing function values
-        it = reversed(self.evals)
-        prevline = numpy.array([-numpy.inf] + [numpy.nan] * self.nbRuns())
-        try:
-            line = advance_iterator(it)
-        except StopIteration:
-            # evals is an empty array
-            return res #list()
-
-        for t in sorted(targets):
-            while line[0] <= t:
-                prevline = line
-                try:
-                    line = advance_iterator(it)
-                except StopIteration:
-                    break
-            res[t] = prevline.copy()
-
+        evals = self.evals
+        if not len(evals):
+            return res
+        targets = sorted(targets)
+        for t, i in zip(targets, _first_rows_reaching(evals[:, 0], targets)):
+            res[t] = (evals[i].copy() if i < len(evals) else
+                      numpy.array([-numpy.inf] + [numpy.nan] * self.nbRuns()))
         return res
         # return list(res[i] for i in targets)
         # alternative output sorted by targets
@@ -1651,31 +1663,15 @@ class DataSet(object):
 
         Details: uses attribute ``self.ert``.
         """
-        res = {}
         _ert = self.ert  # for the side effect of correctly setting self._target
-        tmparray = numpy.vstack((self.target, _ert)).transpose()
-        it = reversed(tmparray)
-        # expect this array to be sorted by decreasing function values
-
-        prevline = numpy.array([-numpy.inf, numpy.inf])
-        try:
-            line = advance_iterator(it)
-        except StopIteration:
+        if not len(_ert):
             # evals is an empty array
             return list()
-
-        for t in sorted(targets):
-            while line[0] <= t:
-                prevline = line
-                try:
-                    line = advance_iterator(it)
-                except StopIteration:
-                    break
-            res[t] = prevline.copy() # is copy necessary? Yes. 
-
+        # expect target to be sorted by decreasing function values
+        idx = _first_rows_reaching(self.target, targets)
         # Return a list of ERT corresponding to the input targets in
-        # targets, sorted along targets
-        return list(res[i][1] for i in targets)
+        # targets, inf if the target was never reached
+        return list(numpy.append(_ert, numpy.inf)[idx])
 
     def detEvals(self, targets, copy=True, bootstrap=False, append_instances=False):
         """return ``len(targets)`` data rows ``self.evals[i, 1:]``.
@@ -1689,31 +1685,30 @@ class DataSet(object):
         or in the "limit" cases the first data line or a line
         ``np.array(self.nbRuns() * [np.nan])``.
 
-        Makes by default a copy of the data, however this might change in
-        future.
+        By default, the rows are the rows of a single new 2-D array, which
+        is a copy of the data. Otherwise, found rows are views into
+        ``self.evals``.
     """
         evals = self.evals
         if append_instances:  # TODO: add append_instances=True in toolstats line 709
             warnings.warn("append_instances was never thoroughly tested")
             evals = self.evals_appended
-        evalsrows = {}  # data rows, easiest target first
-        idata = evals.shape[0] - 1  # current data line index
-        for target in sorted(targets):  # smallest most difficult target first
-            if evals[-1, 0] > target:  # last entry is worse than target
-                evalsrows[target] = np.array(self.nbRuns() * [np.nan])
-                continue
-            while idata > 0 and evals[idata - 1, 0] <= target:  # idata-1 line is good enough
-                idata -= 1  # move up
-            assert evals[idata, 0] <= target and (idata == 0 or evals[idata - 1, 0] > target)
-            evalsrows[target] = evals[idata, 1:].copy() if copy else evals[idata, 1:]
+        idx = _first_rows_reaching(evals[:, 0], targets)  # one row index for each target
+        reached = idx < len(evals)
+        if copy:
+            evalsrows = np.full((len(idx), evals.shape[1] - 1), np.nan)
+            evalsrows[reached] = evals[idx[reached], 1:]
+        else:
+            evalsrows = [evals[i, 1:] if i < len(evals) else
+                         np.array((evals.shape[1] - 1) * [np.nan]) for i in idx]
         if do_assertion:
-            assert all([all((np.isnan(evalsrows[target]) + (evalsrows[target] == self._detEvals2(targets)[i])))
-                        for i, target in enumerate(targets)])
+            rows2 = self._detEvals2(targets)
+            assert all([all((np.isnan(row) + (row == rows2[i])))
+                        for i, row in enumerate(evalsrows)])
         if bootstrap:
-            return [np.asarray(evalsrows[t])[np.random.randint(0,
-                                len(evalsrows[t]), len(evalsrows[t]))]
-                    for t in targets]
-        return [evalsrows[t] for t in targets]  # order w.r.t. input targets
+            return [np.asarray(row)[np.random.randint(0, len(row), len(row))]
+                    for row in evalsrows]
+        return list(evalsrows)  # order w.r.t. input targets
 
     def detEvals_by_instance(self, targets, raw_values=True, **kwargs):
         """return result of `detEvals` for each instance individually
@@ -2290,6 +2285,141 @@ class DataSet(object):
         plt.grid(True)
         return plt.gca()  # not sure which makes most sense
 
+def _loading_workers():
+    """return the number of processes to load data with"""
+    workers = genericsettings.loading_workers
+    if not workers or workers < 0:
+        workers = multiprocessing.cpu_count()
+    return workers
+
+def _loading_map(function, arguments):
+    """return ``map(function, arguments)``, computed in parallel processes
+    if ``genericsettings.loading_workers > 1``.
+
+    The result is the same as with sequential loading: arguments are
+    processed in the calling process until a testbed is set, the remaining
+    ones in worker processes, which get the settings and the testbed of
+    the calling process. Results are returned in the order of `arguments`.
+    """
+    arguments = list(arguments)
+    if _loading_workers() <= 1 or len(arguments) <= 1:
+        return map(function, arguments)  # lazy in Python 3
+    results = []
+    while arguments and not testbedsettings.current_testbed:
+        results.append(function(arguments.pop(0)))
+    workers = min(_loading_workers(), len(arguments))
+    if workers <= 1:
+        return results + [function(arg) for arg in arguments]
+    settings = dict((key, value) for key, value in vars(genericsettings).items()
+                    if not key.startswith('_') and (not callable(value) or key == 'data_filter')
+                    and not isinstance(value, type(genericsettings)))
+    pool = multiprocessing.Pool(workers, _init_loading_worker,
+                                (settings, testbedsettings.current_testbed))
+    try:
+        calls = pool.map(functools.partial(_loading_call, function),
+                         arguments, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    for result, data_format in calls:
+        results.append(result)
+        if data_format is not None:  # as if loaded in this process
+            dataformatsettings.current_data_format = data_format
+    return results
+
+def _init_loading_worker(settings, current_testbed):
+    """set the global state of a worker process of `_loading_map`"""
+    for key, value in settings.items():
+        setattr(genericsettings, key, value)
+    genericsettings.loading_workers = 1  # no nested pools
+    testbedsettings.current_testbed = current_testbed
+
+def _loading_call(function, argument):
+    """return ``function(argument)`` and the data format it has set"""
+    dataformatsettings.current_data_format = None
+    return function(argument), dataformatsettings.current_data_format
+
+def _parse_index_file(index_file_alg_name_and_filter):
+    """return the `list` of `DataSet` instances of an index file.
+
+    `index_file_alg_name_and_filter` are the arguments of
+    `DataSetList.processIndexFile`, given as a single `tuple` to be
+    usable in `_loading_map`. The parsed data are taken from and stored
+    in the `datasetcache` if ``genericsettings.use_dataset_cache``.
+    Data loaded with a `data_filter` are not stored, as they are
+    incomplete, and are taken from the cache only if the filter does not
+    select instances.
+    """
+    index_file, alg_name, data_filter = index_file_alg_name_and_filter
+    use_cache = genericsettings.use_dataset_cache
+    if use_cache and getattr(data_filter, 'instances', None) is None:
+        datasets = datasetcache.load(index_file, alg_name,
+                                     dataset_class=DataSet,
+                                     target_values=TargetValues)
+        if datasets is not None:
+            return [ds for ds in datasets
+                    if data_filter is None or data_filter(ds.funcId, ds.dim)]
+    datasets = list(DataSetList()._index_file_datasets(index_file, alg_name, data_filter))
+    if use_cache and data_filter is None:
+        datasetcache.save(index_file, alg_name, datasets=datasets)
+    return datasets
+
+class DataFilter(object):
+    """predicate to select data by function, dimension and instance.
+
+    Calling ``data_filter(funcId, dim)`` returns `False` when the data of
+    function `funcId` in dimension `dim` are not to be loaded. Arguments
+    which are `None` (unknown) are not used to exclude data. Only trials
+    on `instances` are loaded if `instances` is not `None`.
+
+    `functions`, `dimensions` and `instances` are sequences of `int` or a
+    `str` like ``'1-5,7'``. A `DataFilter` can be set as
+    ``genericsettings.data_filter`` or passed to `DataSetList` and
+    `cocopp.load`. It applies to the header line of each entry in an index
+    file, that is, before any data file is read.
+
+    >>> from cocopp.pproc import DataFilter
+    >>> data_filter = DataFilter(functions='1-5', dimensions=[20, 40])
+    >>> data_filter(3, 20), data_filter(3, 10), data_filter(6, None), data_filter(None, 40)
+    (True, False, False, True)
+    >>> data_filter
+    DataFilter(functions=[1, 2, 3, 4, 5], dimensions=[20, 40], instances=None)
+
+    """
+    def __init__(self, functions=None, dimensions=None, instances=None):
+        self.functions = self._int_list(functions)
+        self.dimensions = self._int_list(dimensions)
+        self.instances = self._int_list(instances)
+
+    @staticmethod
+    def _int_list(values):
+        """return a sorted `list` of `int` from `values` or ``'1-5,7'``"""
+        if values is None:
+            return None
+        if isinstance(values, string_types):
+            res = []
+            for part in values.split(','):
+                first, _, last = part.partition('-')
+                res.extend(range(int(first), int(last or first) + 1))
+            values = res
+        return sorted(set(int(value) for value in values))
+
+    def __call__(self, funcId, dim):
+        return ((funcId is None or self.functions is None or funcId in self.functions) and
+                (dim is None or self.dimensions is None or dim in self.dimensions))
+
+    def __repr__(self):
+        return '%s(functions=%s, dimensions=%s, instances=%s)' % (
+            type(self).__name__, self.functions, self.dimensions, self.instances)
+
+def _function_and_dimension(*lines):
+    """return ``(funcId, dim)`` from index file `lines` or `None` instead"""
+    res = {}
+    for line in lines:
+        for key, value in re.findall(r'\b(funcId|DIM)\s*=\s*(\d+)', line):
+            res.setdefault(key, int(value))
+    return res.get('funcId'), res.get('DIM')
+
 def get_DataSetList(*args, **kwargs):
     """try to load pickle file or fall back to `DataSetList` constructor.
 
@@ -2304,7 +2434,8 @@ def get_DataSetList(*args, **kwargs):
     extension = '.pickle'
     def fallback():
         return DataSetList(*args, **kwargs)
-    if len(args) != 1 or len(kwargs) or sys.version_info[0] < 3:
+    if (len(args) != 1 or len(kwargs) or sys.version_info[0] < 3 or
+            genericsettings.data_filter is not None):  # the pickle file has all data
         return fallback()
     arg1 = args[0]
     if isinstance(arg1, string_types):
@@ -2348,13 +2479,17 @@ class DataSetList(list):
     #Do not inherit from set because DataSet instances are mutable which means
     #they might change over time.
 
-    def __init__(self, args=[], check_data_type=True):
+    def __init__(self, args=[], check_data_type=True, data_filter=None):
         """Instantiate self from a list of folder- or filenames or 
         ``DataSet`` instances.
 
         :keyword list args: strings being either info file names, folder
                             containing info files or pickled data files,
                             or a list of DataSets.
+        :keyword data_filter: predicate ``data_filter(funcId, dim)``
+                              to select the data to be read from files,
+                              like a `DataFilter`, by default
+                              ``genericsettings.data_filter``.
 
         Exceptions:
         Warning -- Unexpected user input.
@@ -2382,22 +2517,28 @@ class DataSetList(list):
         if hasattr(args[0], 'algId'):
             print('try calling DataSetList() with option ' +
                   '``check_data_type=False``')
+        if data_filter is None:
+            data_filter = genericsettings.data_filter
         fnames = []
         alg_names = []
         for name in args:
             if isinstance(name, string_types) and findfiles.is_recognized_repository_filetype(name):
                 # the found names may not at all reflect name anymore
-                fnames.extend(findfiles.main(name))
+                fnames.extend(findfiles.main(name, data_filter))
             else:
                 fnames.append(name)
             alg_names.extend((len(fnames) - len(alg_names)) * [name])
         assert len(fnames) == len(alg_names)
+        # parse the index files, in parallel if genericsettings.loading_workers > 1
+        parsed_index_files = iter(_loading_map(_parse_index_file,
+            [(name, alg_name, data_filter) for name, alg_name in zip(fnames, alg_names)
+             if not isinstance(name, DataSet) and name.endswith('.info')]))
         for name, alg_name in zip(fnames, alg_names): 
             if isinstance(name, DataSet):
                 self.append(name)
                 # we could check here whether name.algId and alg_name are similar or consistent
             elif name.endswith('.info'):
-                self.processIndexFile(name, alg_name)
+                self.processIndexFile(name, alg_name, next(parsed_index_files))
             elif name.endswith('.pickle') or name.endswith('.pickle.gz'):
                 try:
                     # cocofy(name)
@@ -2438,8 +2579,26 @@ class DataSetList(list):
             if genericsettings.warning_level >= 1:
                 print("  Data consistent according to consistency_check() in pproc.DataSet")
             
-    def processIndexFile(self, indexFile, alg_name=None):
-        """Reads in an index (.info?) file information on the different runs."""
+    def processIndexFile(self, indexFile, alg_name=None, datasets=None,
+                         data_filter=None):
+        """Reads in an index (.info?) file information on the different runs.
+
+        `datasets` are the `DataSet` instances parsed from `indexFile`
+        beforehand, e.g. in a worker process by `_parse_index_file`.
+
+        Entries for which the predicate ``data_filter(funcId, dim)`` of the
+        header line is `False` are skipped without reading their data
+        files, see `DataFilter`.
+        """
+        if datasets is None:
+            datasets = self._index_file_datasets(indexFile, alg_name, data_filter)
+        for ds in datasets:
+            if len(ds.instancenumbers) > 0:
+                self.append(ds)
+
+    def _index_file_datasets(self, indexFile, alg_name=None, data_filter=None):
+        """generate the `DataSet` instances described in `indexFile`
+        which pass `data_filter`"""
 
         if alg_name.endswith('.info'):
             alg_name = None
@@ -2486,12 +2645,15 @@ class DataSetList(list):
                         data = advance_iterator(f)  # this is the filename of the data file!?
                         data_file_names.append(data)
                         nbLine += 3
+                        if data_filter is not None and not data_filter(
+                                *_function_and_dimension(header, data)):
+                            continue
                         #TODO: check that something is not wrong with the 3 lines.
-                        ds = DataSet(header, comment, data, indexFile)
+                        ds = DataSet(header, comment, data, indexFile,
+                                     getattr(data_filter, 'instances', None))
                         if alg_name is not None:
                             ds.algId = alg_name
-                        if len(ds.instancenumbers) > 0:                    
-                            self.append(ds)
+                        yield ds
                     except StopIteration:
                         break
             if len(data_file_names) != len(set(data_file_names)):
@@ -2507,15 +2669,76 @@ class DataSetList(list):
             print('Could not load "%s".' % indexFile)
             print('I/O error(%s): %s' % (e.errno, e.strerror))
 
+    @staticmethod
+    def _index_key(ds):
+        """return a hashable key such that ``ds == o`` implies equal keys.
+
+        The key contains the attributes compared in `DataSet.__eq__`, which
+        remain the same when a `DataSet` is merged with another.
+        """
+        def hashable(value):
+            return tuple(value) if isinstance(value, list) else value
+        key = (ds.__class__,) + tuple(hashable(getattr(ds, name, None))
+                                     for name in ('funcId', 'dim', 'algId', 'comment'))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _dataset_index(self):
+        """return the `dict` which maps `_index_key` to a list of elements,
+
+        (re)building it when `self` was changed other than by `append`.
+        """
+        if getattr(self, '_index_length', None) != len(self):
+            self._index = {}
+            for ds in self:
+                self._index.setdefault(self._index_key(ds), []).append(ds)
+            self._index_length = len(self)
+        return self._index
+
+    def _reset_index(self):
+        """enforce rebuilding the index, e.g. after an `algId` was changed"""
+        self._index_length = None
+
+    def _candidates(self, o):
+        """return the elements of `self` which may be equal to `o`, in list order"""
+        key = self._index_key(o)
+        if key is None:
+            return self
+        candidates = self._dataset_index().get(key, [])
+        if len(candidates) > 1:
+            ids = set(id(ds) for ds in candidates)
+            candidates = [ds for ds in self if id(ds) in ids]
+        return candidates
+
+    def __setitem__(self, key, value):
+        self._reset_index()
+        super(DataSetList, self).__setitem__(key, value)
+
+    def __getstate__(self):
+        """the index is rebuilt when needed, hence not pickled"""
+        state = dict(self.__dict__)
+        state.pop('_index', None)
+        state.pop('_index_length', None)
+        return state
+
     def append(self, o, check_data_type='warn'):
-        """Redefines the append method to check for unicity."""
+        """Redefines the append method to check for unicity.
+
+        Elements equal to `o` are looked up in a `dict` index, hence
+        appending `n` elements takes linear time in `n`. The index
+        assumes that the attributes compared in `DataSet.__eq__` do not
+        change while the element is in `self`, see `_reset_index`.
+        """
 
         if check_data_type and not isinstance(o, DataSet):
             warnings.warn('appending a non-DataSet {} to a DataSetList'.format(o))
             if check_data_type != 'warn':
                 raise ValueError('Expect DataSet instance.')
         isFound = False
-        for i in self:
+        for i in self._candidates(o):
             if i == o:
                 isFound = True
                 if 1 < 3 and i.instancenumbers == o.instancenumbers and (
@@ -2564,13 +2787,16 @@ class DataSetList(list):
                 #     warnings.warn("merged {} getting an inconsistent data set {}".format(o, i))
                 break
         if not isFound:
+            index = self._dataset_index()
             list.append(self, o)
+            index.setdefault(self._index_key(o), []).append(o)
+            self._index_length = len(self)
 
     def extend(self, o):
         """Extend with elements.
 
         This method is implemented to prevent problems since append was
-        superseded. This method could be the origin of efficiency issue.
+        superseded. Elements are merged as in `append`.
 
         """
         for i in o:
@@ -3003,8 +3229,10 @@ class DataSetList(list):
                     if data_per_target is not None:
                         # make sure to get 15 numbers for each target
                         if 1 < 3:
-                            evals = [np.sort(np.asarray(d)[toolsstats.randint_derandomized(0, len(d), data_per_target)])
-                                         for d in evals]
+                            indices = toolsstats.randint_derandomized(
+                                0, [len(d) for d in evals], (len(evals), data_per_target))
+                            evals = [np.sort(np.asarray(d)[idx])
+                                         for d, idx in zip(evals, indices)]
                         else:  # this assumes that data_per_target is not smaller than nbRuns
                             evals = [np.sort(toolsstats.fix_data_number(d, data_per_target))
                                         for d in evals]
@@ -3056,9 +3284,11 @@ class DataSetList(list):
                             reference_scores[ds.funcId] = \
                                 np.asarray([data_per_target * [val]
                                     for val in reference_scores[ds.funcId]])
-                        for i, line in enumerate(reference_scores[ds.funcId]):
-                            reference_scores[ds.funcId][i] = \
-                                np.sort(np.asarray(line)[toolsstats.randint_derandomized(0, len(line), data_per_target)])
+                        lines = reference_scores[ds.funcId]
+                        indices = toolsstats.randint_derandomized(
+                            0, [len(line) for line in lines], (len(lines), data_per_target))
+                        for i, idx in enumerate(indices):
+                            lines[i] = np.sort(np.asarray(lines[i])[idx])
                                 # np.sort(toolsstats.fix_data_number(line, data_per_target))
                     ref_scores.append(np.hstack(reference_scores[ds.funcId]))
                     # 'needs to be checked', qqq
@@ -3145,6 +3375,35 @@ class DataSetList(list):
 
         return lines, scores
 
+    def get_evals_tensor(self, target_values, fct, dim):
+        """return a ``len(datasets) x len(target_values) x nb_runs``
+        array of evaluations to reach each target and the list of the
+        respective `datasets` in ``self`` on function `fct` in dimension
+        `dim`.
+
+        The evaluations are those from `DataSet.detEvals`. Data sets with
+        less than ``nb_runs`` runs, the largest number of runs, are padded
+        with `nan` as for unsuccessful runs.
+
+        Example
+        -------
+        Get the median run lengths of all algorithms on f1 in 20-D::
+
+            evals, datasets = dsl.get_evals_tensor([1e-1, 1e-7], 1, 20)
+            medians = np.nanmedian(evals, axis=2)  # for each alg and target
+
+        """
+        try:
+            target_values = target_values((fct, dim))
+        except TypeError:
+            target_values = target_values
+        datasets = [ds for ds in self if ds.funcId == fct and ds.dim == dim]
+        nb_runs = max([ds.nbRuns() for ds in datasets] + [0])
+        evals = np.full((len(datasets), len(target_values), nb_runs), np.nan)
+        for i, ds in enumerate(datasets):
+            evals[i, :, :ds.nbRuns()] = ds.detEvals(target_values, copy=False)
+        return evals, datasets
+
     def det_best_data(self, target_values, fct, dim,
                            number=15):
         """return a list of the ``number`` smallest evaluations over all
@@ -3401,6 +3660,8 @@ def set_unique_algId(ds_list, ds_list_reference, taken_ids=None):
             while algId + ' ' + str(i) in taken_ids:
                 i += 1
             ds.algId = algId + ' ' + str(i)
+    if isinstance(ds_list, DataSetList):
+        ds_list._reset_index()
 
 
 def processInputArgs(args, process_background_algorithms=False):
@@ -3448,18 +3709,21 @@ def processInputArgs(args, process_background_algorithms=False):
 
 
 def process_arguments(args, current_hash, dictAlg, dsList, sortedAlgs):
+    args = [alg.strip().rstrip(os.path.sep)  # lstrip would not be the same folder anymore
+            for alg in args]
+    # load the data of all algorithms, in parallel if genericsettings.loading_workers > 1
+    loaded = iter(_loading_map(get_DataSetList,
+        [alg for alg in args if alg and findfiles.is_recognized_repository_filetype(alg)]))
     for alg in args:
-        alg = alg.strip().rstrip(os.path.sep)  # lstrip would not be the same folder anymore
         if alg == '':  # might cure an lf+cr problem when using cywin under Windows
             continue
         if findfiles.is_recognized_repository_filetype(alg):
+            tmpDsList = next(loaded)
             if 11 < 3:
                 filelist = findfiles.main(alg)  # this destroys name information
                 tmpDsList = DataSetList(filelist)  # DataSetList calls findfiles.main anyway
                 # Do here any sorting or filtering necessary.
                 # filelist = list(i for i in filelist if i.count('ppdata_f005'))
-            else:
-                tmpDsList = get_DataSetList(alg)
             for ds in tmpDsList:
                 ds._data_folder = alg
                 # to restore name information:
@@ -23,7 +23,7 @@ import os, sys
 import numpy
 import warnings
 
-from . import genericsettings, testbedsettings, dataformatsettings
+from . import genericsettings, testbedsettings, dataformatsettings, findfiles
 
 from pdb import set_trace
 from six import string_types, advance_iterator
@@ -399,6 +399,197 @@ def align_data(data, idx_evals, idx_funvals, rewind_reader=False):
     return res
 
 
+def align_data_vectorized(data, idx_evals, idx_funvals, rewind_reader=False):
+    """Aligns the data from a list of data arrays like `align_data`.
+
+    Instead of advancing each reader line by line, the sequence of
+    alignment values is computed first and each trial is then looked up
+    for all alignment values at once with `numpy.searchsorted`. The
+    readers of `data` are not advanced, hence `rewind_reader` has no
+    effect here.
+
+    The result is identical to the one of `align_data`, to which we fall
+    back when the alignment column of a trial is not monotonous (the
+    function values must not increase in a `HMultiReader`, the
+    evaluations must not decrease in a `VMultiReader`) or not finite.
+
+    >>> import os, glob, tarfile, tempfile
+    >>> import numpy as np
+    >>> from cocopp import readalign, dataformatsettings, testbedsettings
+    >>> from cocopp.pproc import TargetValues
+    >>> folder = tempfile.mkdtemp()
+    >>> tarfile.open(os.path.join(os.path.dirname(readalign.__file__),
+    ...     'refalgs', 'best2009-bbob.tar.gz')).extractall(folder)
+    >>> _ = testbedsettings.load_current_testbed('bbob', TargetValues)
+    >>> dataformatsettings.current_data_format = dataformatsettings.BBOBOldDataFormat()
+    >>> for ext, Reader in (('dat', readalign.HMultiReader),
+    ...                     ('tdat', readalign.VMultiReader)):
+    ...     files = sorted(glob.glob(os.path.join(folder, '*', '*_f0[12]_d10.' + ext)))
+    ...     data = readalign.split(files)[0]
+    ...     res = readalign.align_data_vectorized(Reader(data), 0, 2)
+    ...     res_lines = readalign.align_data(Reader(data), 0, 2)
+    ...     print(all(np.array_equal(a, b, equal_nan=True)
+    ...               for a, b in zip(res, res_lines)))
+    True
+    True
+
+    """
+    if not data or data.isHArray:
+        return align_data(data, idx_evals, idx_funvals, rewind_reader)
+    arrays = [reader.data for reader in data]
+    # finished readers set their evaluations column to nan
+    nan_data_column = data[0].idxEvals
+    if isinstance(data, HMultiReader):
+        res = _align_h_arrays(arrays, idx_evals, idx_funvals,
+                              idx_evals == nan_data_column, data.nbPtsF)
+    elif isinstance(data, VMultiReader):
+        res = _align_v_arrays(arrays, idx_evals, idx_funvals,
+                              idx_funvals == nan_data_column)
+    else:
+        raise TypeError("reset class %s not implemented" % type(data))
+    if res is None:
+        return align_data(data, idx_evals, idx_funvals, rewind_reader)
+    return (res, numpy.asarray([a[-1, idx_evals] for a in arrays]),
+            numpy.asarray([a[-1, idx_funvals] for a in arrays]))
+
+
+def _is_close_array(a, b, rel_tol=1e-09, abs_tol=0.0):
+    """elementwise `is_close`"""
+    return numpy.abs(a - b) <= numpy.maximum(
+        rel_tol * numpy.maximum(numpy.abs(a), numpy.abs(b)), abs_tol)
+
+
+def _align_h_arrays(arrays, idx_evals, idx_funvals, nan_if_finished, nbPtsF):
+    """return the horizontally aligned array like `HMultiReader` does.
+
+    Return `None` if the f-values of a trial increase or are not finite.
+    """
+    fs = [a[:, idx_funvals] for a in arrays]
+    if any(not numpy.isfinite(f).all() or numpy.any(f[1:] > f[:-1])
+           for f in fs):
+        return None
+    neg_fs = [-f for f in fs]  # ascending, for searchsorted
+    all_f = numpy.sort(numpy.concatenate(fs))
+    min_last_f = min(f[-1] for f in fs)
+
+    def current_value(idx, is_negative):
+        factor = -1. if is_negative else 1.
+        return factor * numpy.power(10, idx / nbPtsF)
+
+    def max_reached_f(value):
+        """largest f-value of the current line of all trials, which are
+        either the first f-values <= `value` or close to `value`"""
+        i = numpy.searchsorted(all_f, value, 'right')
+        maxf = all_f[i - 1] if i else None
+        if i < len(all_f) and (all_f[i] - value <=
+                               1e-8 * max(abs(all_f[i]), abs(value))):
+            # the last f-value above `value` may be close, check exactly
+            close = []
+            for f, neg_f in zip(fs, neg_fs):
+                k = numpy.searchsorted(neg_f, -value)
+                if k and is_close(f[k - 1], value):
+                    close.append(f[k - 1])
+            if close:
+                maxf = max(close)
+        if maxf is None:  # This should not happen
+            raise ValueError('Value %g is not reached.')
+        return maxf
+
+    # same sequence of alignment values as with HMultiReader
+    fmax = max(f[0] for f in fs)
+    idx = numpy.ceil(numpy.log10(fmax if fmax > 0 else 1e-19) * nbPtsF)
+    idx_old, is_negative = 0., False
+    value = current_value(idx, is_negative)
+    values, labels = [], []
+    while True:
+        maxf = max_reached_f(value)
+        if maxf <= 0.:
+            if value > 0.:
+                idx_old, idx = idx, -numpy.inf
+                label = 0.
+            else:
+                idx = max((idx, numpy.floor(numpy.log10(-maxf + 1e-12) * nbPtsF)))
+                label = current_value(idx, is_negative)
+        else:
+            if maxf >= 2e-12:
+                maxf -= 1e-12
+            else:
+                maxf /= 2
+            idx = min(idx, numpy.ceil(numpy.log10(maxf) * nbPtsF))
+            label = current_value(idx, is_negative)
+        values.append(value)
+        labels.append(label)
+        if not min_last_f <= value:  # no trial reaches further
+            break
+        if idx == -numpy.inf:
+            idx, is_negative = idx_old, True
+        elif is_negative:
+            idx += 1
+        else:
+            idx -= 1
+        value = current_value(idx, is_negative)
+        if not min_last_f <= value:
+            break
+    values = numpy.asarray(values)
+
+    # look up the data line of each trial for all alignment values
+    res = [labels]
+    for a, f, neg_f in zip(arrays, fs, neg_fs):
+        n = len(f)
+        k = numpy.searchsorted(neg_f, -values)  # number of f-values > value
+        reached = k < n
+        # the last line above value is taken when it is close to value
+        back = (k > 0) & reached & _is_close_array(f[numpy.maximum(k - 1, 0)], values)
+        column = a[numpy.minimum(k - back, n - 1), idx_evals]
+        if nan_if_finished:
+            column[~reached] = numpy.nan
+        res.append(column)
+    return numpy.column_stack(res)
+
+
+def _align_v_arrays(arrays, idx_evals, idx_funvals, nan_if_finished):
+    """return the vertically aligned array like `VMultiReader` does.
+
+    Return `None` if the evaluations of a trial decrease or are not
+    finite.
+    """
+    es = [a[:, idx_evals] for a in arrays]
+    if any(not numpy.isfinite(e).all() or numpy.any(e[1:] < e[:-1])
+           for e in es):
+        return None
+    # the first line of each trial is read before any alignment value
+    # is compared, unless it is also the last line
+    values = [min(e[0] for e in es)]
+    for value in numpy.unique(numpy.concatenate(
+            [e[1:] if len(e) > 1 else e for e in es])):
+        if value > values[-1] and not is_close(value, values[-1]):
+            values.append(value)
+    values = numpy.asarray(values)
+
+    res = [values]
+    for a, e in zip(arrays, es):
+        n = len(e)
+        e_next = e[1:] if n > 1 else e
+        # number of lines read with evaluations <= or close to value
+        k = numpy.searchsorted(e_next, values, 'right')
+        while True:
+            close = k < len(e_next)
+            close[close] = _is_close_array(e_next[k[close]], values[close])
+            if not close.any():
+                break
+            k += close
+        k = numpy.maximum.accumulate(k)
+        if n > 1:
+            idx, finished = k, k == n - 1
+        else:
+            idx, finished = numpy.zeros_like(k), k == 1
+        column = a[idx, idx_funvals]
+        if nan_if_finished:
+            column[finished] = numpy.nan
+        res.append(column)
+    return numpy.column_stack(res)
+
+
 def alignArrayData(data):
     """Aligns the data from a list of aligned arrays.
 
@@ -424,9 +615,34 @@ def alignArrayData(data):
     # of the data.
 
 
+def align_array_data_vectorized(data):
+    """Aligns the data from a list of aligned arrays like `alignArrayData`.
+
+    Horizontal alignment of arrays with a single data column, like ERT
+    arrays with the target values in the first column, is computed with
+    `numpy.searchsorted` like in `align_data_vectorized`. Otherwise, and
+    when the alignment column is not monotonous or not finite, the
+    result of `alignArrayData` is returned.
+    """
+    arrays = [reader.data for reader in data]
+    if (isinstance(data, HArrayMultiReader) and arrays and
+            all(numpy.ndim(a) == 2 and numpy.shape(a)[1] == 2 for a in arrays)):
+        res = _align_h_arrays(arrays, 1, 0, True, data.nbPtsF)
+        if res is not None:
+            return res
+    return alignArrayData(data)
+
+
 def openfile(filePath, **kwargs):
-    """`kwargs` are passed to `open`"""
+    """`kwargs` are passed to `open`.
+
+    Files in a tar or zip archive are read from the archive, see
+    `findfiles.open_member`.
+    """
     if not os.path.isfile(filePath):
+        member = findfiles.open_member(filePath, **kwargs)
+        if member is not None:
+            return member
         if ('win32' in sys.platform) and len(filePath) > 259:
             raise IOError(2, 'The path is too long for the file "%s".' % filePath)
         else:
@@ -439,11 +655,35 @@ def openfile(filePath, **kwargs):
         return open(filePath, 'r', **kwargs)
 
 
-def split(dataFiles, idx_to_load=None, dim=None):
+def split(dataFiles, idx_to_load=None, dim=None, bulk=True):
     """Split a list of data files into arrays corresponding to data sets.
        The Boolean list idx_to_load is thereby indicating whether a
        given part of the split is to be considered or not if None, all
        instances are considered.
+
+       Each file is first cut into its ``%``-headed instance blocks and
+       the data lines of a block are then converted with a single `numpy`
+       call. Blocks which do not form a regular array (e.g. with invalid
+       numbers or incomplete lines) and all blocks when ``bulk is False``
+       are converted line by line, as was done in former versions.
+
+       Return ``data_sets, algorithms, reference_values, success_ratio``.
+
+    >>> import os, glob, tarfile, tempfile
+    >>> import numpy as np
+    >>> from cocopp import readalign
+    >>> folder = tempfile.mkdtemp()
+    >>> tarfile.open(os.path.join(os.path.dirname(readalign.__file__),
+    ...     'refalgs', 'best2009-bbob.tar.gz')).extractall(folder)
+    >>> files = sorted(glob.glob(os.path.join(folder, '*', '*_f0[12]_*dat')))
+    >>> res, res_lines = readalign.split(files), readalign.split(files, bulk=False)
+    >>> len(res[0]), len(res[1]) == sum(len(d) for d in res[0])
+    (24, True)
+    >>> all(np.array_equal(a, b, equal_nan=True) for a, b in zip(res[0], res_lines[0]))
+    True
+    >>> res[1:] == res_lines[1:]
+    True
+
     """
 
     data_sets = []
@@ -454,33 +694,16 @@ def split(dataFiles, idx_to_load=None, dim=None):
         with openfile(fil) as f:
             # This doesnt work with windows.
             # content = numpy.loadtxt(fil, comments='%')
-            lines = f.readlines()
+            lines = f.read().splitlines()
 
-        content = []
         idx = 0  # instance index for checking in idx_to_load
         current_instance = 0
         current_reference_value = 0
         is_best_algorithm_data = False
 
-        # Save values in array content. Check for nan and inf.
-        for line in lines:
-            if line.startswith('%'):
-                if content:
-                    if (idx_to_load is None) or (idx_to_load and len(idx_to_load) > idx and idx_to_load[idx]):
-                        data_sets.append(numpy.vstack(content))
-                    elif genericsettings.verbose:
-                            print('skipped instance...')
-                    # Use only the reference values from instances 1 to 5.
-                    if current_instance in (1, 2, 3, 4, 5):
-                        reference_values[current_instance] = current_reference_value
-
-                    content = []
-                    current_instance = 0
-                    current_reference_value = 0
-                    is_best_algorithm_data = False
-                    idx += 1
-
-                # Get the current instance and reference value.
+        for header, block in _instance_blocks(lines):
+            # Get the current instance and reference value.
+            for line in header:
                 parts = line.strip('\n').strip(r'%').split(', ')
                 for elem in parts:
                     if '=' in elem:
@@ -492,61 +715,135 @@ def split(dataFiles, idx_to_load=None, dim=None):
                         elif key.strip() == 'algorithm type':
                             is_best_algorithm_data = 'best' == value.strip()
 
+            content = None
+            if bulk:
+                content = _parse_block(block, is_best_algorithm_data, dim,
+                                       algorithms, success_ratio)
+            if content is None:
+                content = _parse_lines(block, is_best_algorithm_data, dim,
+                                       algorithms, success_ratio, fil)
+            if content is None:  # no data in this block
                 continue
 
-            # else remove end-of-line sign
-            # and split into single strings
-            data = line.strip('\n').split()
-
-            # remove additional data for best algorithm
-            if is_best_algorithm_data:
-                index = len(data) - 3
-                if index <= 0:
-                    warnings.warn('Invalid best algorithm data!')
-                else:
-                    algorithms.append(data[index])
-                    successful_runs = int(data[index + 1])
-                    all_runs = int(data[index + 2])
-                    success_ratio.append([successful_runs, all_runs])
-                    data = data[:-3]  # remove the three processed items from data
-
-            if dim and len(data) != dim + 5:
-                warnings.warn('Incomplete line %s in  ' % line +
-                              'data file %s: ' % fil)
-                continue
-            for index in range(len(data)):
-                if data[index] in ('Inf', 'inf'):
-                    data[index] = numpy.inf
-                elif data[index] in ('-Inf', '-inf'):
-                    data[index] = -numpy.inf
-                elif data[index] in ('NaN', 'nan'):
-                    data[index] = numpy.nan
-                else:
-                    try:
-                        data[index] = float(data[index])
-                    except ValueError:
-                        warnings.warn('%s is not a valid number!' % data[index])
-                        data[index] = numpy.nan
-
-            if data:
-                content.append(numpy.array(data))
-            # Check that it always have the same length?
-
-        if content:
             if (idx_to_load is None) or (idx_to_load and len(idx_to_load) > idx and idx_to_load[idx]):
-                data_sets.append(numpy.vstack(content))
+                data_sets.append(content)
             elif genericsettings.verbose:
                     print('skipped instance...')
-
             # Use only the reference values from instances 1 to 5.
             if current_instance in (1, 2, 3, 4, 5):
                 reference_values[current_instance] = current_reference_value
 
+            current_instance = 0
+            current_reference_value = 0
+            is_best_algorithm_data = False
+            idx += 1
+
     if len(algorithms) < len(data_sets):
         algorithms = []
 
     return data_sets, algorithms, reference_values, success_ratio
 
 
+def _instance_blocks(lines):
+    """yield ``(header_lines, data_lines)`` for each ``%``-headed block.
+
+    `header_lines` are consecutive lines starting with ``%``, `data_lines`
+    are all lines up to the next header. The first block has no header
+    when the data do not start with a ``%`` line.
+    """
+    header, block = [], []
+    for line in lines:
+        if line.startswith('%'):
+            if block:
+                yield header, block
+                header, block = [], []
+            header.append(line)
+        else:
+            block.append(line)
+    if header or block:
+        yield header, block
+
+
+def _parse_block(lines, is_best_algorithm_data, dim, algorithms, success_ratio):
+    """return the data `lines` of an instance block as 2-D array,
+
+    converted in a single call, or `None` if the lines do not form a
+    regular array of numbers (then `_parse_lines` must be used).
+
+    For best algorithm data, the last three entries of each line
+    (algorithm, successful runs and all runs) are appended to the
+    `algorithms` and `success_ratio` lists.
+    """
+    lines = [line for line in lines if line]
+    if not lines:
+        return None
+    if is_best_algorithm_data:
+        parts = [line.rsplit(None, 3) for line in lines]
+        if any(len(p) < 4 for p in parts):
+            return None
+        lines = [p[0] for p in parts]
+    try:
+        # raises on lines of different length or invalid numbers
+        content = numpy.array(list(map(str.split, lines)), dtype=float)
+        if is_best_algorithm_data:
+            ratios = [[int(p[2]), int(p[3])] for p in parts]
+    except ValueError:
+        return None
+    if not content.shape[1] or (dim and content.shape[1] != dim + 5):
+        return None
+    if is_best_algorithm_data:
+        algorithms.extend(p[1] for p in parts)
+        success_ratio.extend(ratios)
+    return content
+
+
+def _parse_lines(lines, is_best_algorithm_data, dim, algorithms,
+                 success_ratio, fil):
+    """return the data `lines` of an instance block as 2-D array or `None`,
+
+    converting each line and each number one by one.
+    """
+    content = []
+    for line in lines:
+        # remove end-of-line sign
+        # and split into single strings
+        data = line.strip('\n').split()
+
+        # remove additional data for best algorithm
+        if is_best_algorithm_data:
+            index = len(data) - 3
+            if index <= 0:
+                warnings.warn('Invalid best algorithm data!')
+            else:
+                algorithms.append(data[index])
+                successful_runs = int(data[index + 1])
+                all_runs = int(data[index + 2])
+                success_ratio.append([successful_runs, all_runs])
+                data = data[:-3]  # remove the three processed items from data
+
+        if dim and len(data) != dim + 5:
+            warnings.warn('Incomplete line %s in  ' % line +
+                          'data file %s: ' % fil)
+            continue
+        for index in range(len(data)):
+            if data[index] in ('Inf', 'inf'):
+                data[index] = numpy.inf
+            elif data[index] in ('-Inf', '-inf'):
+                data[index] = -numpy.inf
+            elif data[index] in ('NaN', 'nan'):
+                data[index] = numpy.nan
+            else:
+                try:
+                    data[index] = float(data[index])
+                except ValueError:
+                    warnings.warn('%s is not a valid number!' % data[index])
+                    data[index] = numpy.nan
+
+        if data:
+            content.append(numpy.array(data))
+        # Check that it always have the same length?
+    return numpy.vstack(content) if content else None
+
+
 def is_close(a, b, rel_tol=1e-09, abs_tol=0.0):
     return abs(a-b) <= max(rel_tol * max(abs(a), abs(b)), abs_tol)
@@ -23,6 +23,7 @@ import warnings
 import webbrowser
 import matplotlib
 from . import genericsettings, testbedsettings, rungeneric1, rungenericmany, toolsdivers, bestalg, archiving
+from . import pproc
 from .toolsdivers import truncate_latex_command_file, print_done, diff_attr
 from .ppfig import Usage
 from .compall import ppfigs
@@ -190,6 +191,18 @@ def main(argv=None):
             takes values between 0 (default) and 1000, fast processing that
             does not write eps files and uses a small number of bootstrap samples
 
+        --workers=WORKERS
+
+            loads the data files with WORKERS parallel processes, 0 uses
+            all cores, see `genericsettings.loading_workers`
+
+        --functions=FUNCTIONS, --dimensions=DIMENSIONS, --instances=INSTANCES
+
+            loads only data of the given functions, dimensions and/or
+            instances, like ``--functions=1-5,7 --dimensions=20,40``. Other
+            data are skipped before their data files are read, see
+            `pproc.DataFilter` and `genericsettings.data_filter`
+
         --no-svg
 
             do not generate the svg figures which are used in html files
@@ -229,6 +242,31 @@ def main(argv=None):
     default :file:`ppdata` to :file:`outputfolder`. The arguments can
     also be presented as a list of strings.
 
+    The options ``--workers``, ``--functions``, ``--dimensions`` and
+    ``--instances`` only apply to the call they are passed to:
+
+    >>> import shutil, tempfile
+    >>> import cocopp
+    >>> def print_(*args, **kwargs): pass
+    >>> cocopp.archives.bbob._print = print_  # avoid download notification
+    >>> path = cocopp.archives.bbob.get(4)
+    >>> folder = tempfile.mkdtemp()
+    >>> interactive_mode = cocopp.genericsettings.interactive_mode
+    >>> cocopp.genericsettings.interactive_mode = False  # no browser
+    >>> print('ESC'); res = cocopp.main(['--functions=1,2', '--dimensions=2',
+    ...                                  '--tab-only', '-o', folder, path])  # doctest:+ELLIPSIS
+    ESC...
+    >>> sorted(set((ds.funcId, ds.dim) for dsl in res.values() for ds in dsl))
+    [(1, 2), (2, 2)]
+    >>> print(cocopp.genericsettings.data_filter)
+    None
+    >>> print('ESC'); res = cocopp.main(['--tab-only', '-o', folder, path])  # doctest:+ELLIPSIS
+    ESC...
+    >>> len(set((ds.funcId, ds.dim) for dsl in res.values() for ds in dsl))
+    144
+    >>> cocopp.genericsettings.interactive_mode = interactive_mode
+    >>> shutil.rmtree(folder)
+
     """
     # global shortoptlist
     # global longoptlist
@@ -237,11 +275,16 @@ def main(argv=None):
         argv = sys.argv[1:]
     if not isinstance(argv, list) and str(argv) == argv:  # get rid of .split in python shell
         argv = argv.split()
+    # the options --workers and --functions etc. change these settings only
+    # for this call
+    previous_loading_settings = (genericsettings.loading_workers,
+                                 genericsettings.data_filter)
     try:
         try:
             opts, args = getopt.getopt(argv, short_options,
                                        long_options +
-                                       ['include-single', 'in-a-hurry=', 'input-path='])
+                                       ['include-single', 'in-a-hurry=', 'input-path=', 'workers=',
+                                        'functions=', 'dimensions=', 'instances='])
         except getopt.error as msg:
             raise Usage(msg)
 
@@ -270,6 +313,7 @@ def main(argv=None):
 
         genopts = []
         outputdir = genericsettings.outputdir
+        data_filter_options = {}
         for o, a in opts:
             if o in ("-h", "--help"):
                 usage()
@@ -282,6 +326,10 @@ def main(argv=None):
                     print('in_a_hurry like ', genericsettings.in_a_hurry, ' (should finally be set to zero)')
             elif o in ("--input-path", ):
                 inputdir = a
+            elif o == "--workers":
+                genericsettings.loading_workers = int(a)
+            elif o in ("--functions", "--dimensions", "--instances"):
+                data_filter_options[o[2:]] = a
             elif o in "--no-svg":
                 genericsettings.generate_svg_files = False
             elif o == "--no-rld-single-fcts":
@@ -353,6 +401,8 @@ def main(argv=None):
                     is_assigned = True
                 if not is_assigned:
                     assert False, "unhandled option"
+        if data_filter_options:
+            genericsettings.data_filter = pproc.DataFilter(**data_filter_options)
         if not genericsettings.verbose:
             warnings.filterwarnings('module', '.*', UserWarning, '.*')
             # warnings.simplefilter('ignore')  # that is bad, but otherwise to many warnings appear
@@ -465,6 +515,9 @@ def main(argv=None):
         print(err.msg, file=sys.stderr)
         print("For help use -h or --help", file=sys.stderr)
         return 2
+    finally:
+        (genericsettings.loading_workers,
+         genericsettings.data_filter) = previous_loading_settings
 
 
 def update_background_algorithms(input_dir):
@@ -65,6 +65,58 @@ class InfolderGoneWithTheWind:
             raise ValueError("inconsistent temporary folder name %s vs %s"
                              % (self._target_dir, self.target_dir))
 
+
+def serve_folder(folder):
+    """serve `folder` via HTTP from a thread and return ``(url, server)``.
+
+    The server is a local stand-in for a remote data archive.
+    It answers HTTP Range requests unless ``server.ranges = False`` and
+    records the sent status codes in the `list` ``server.codes``. Stop it
+    with ``server.shutdown()``.
+    """
+    import re
+    import functools
+    import threading
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class RangeRequestHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_response(self, code, message=None):
+            self.server.codes.append(int(code))
+            SimpleHTTPRequestHandler.send_response(self, code, message)
+
+        def do_GET(self):
+            match = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+            path = self.translate_path(self.path)
+            if not (self.server.ranges and match and os.path.isfile(path)):
+                return SimpleHTTPRequestHandler.do_GET(self)
+            with open(path, 'rb') as file_:
+                data = file_.read()
+            start = int(match.group(1))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */%d' % len(data))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d'
+                             % (start, len(data) - 1, len(data)))
+            self.send_header('Content-Length', str(len(data) - start))
+            self.end_headers()
+            self.wfile.write(data[start:])
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(
+        RangeRequestHandler, directory=folder))
+    server.ranges, server.codes = True, []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return 'http://127.0.0.1:%d' % server.server_address[1], server
+
+
 def depreciated_data_archive_get(substrs):
     """CAVEAT: this won't work anymore as the get_first method changed to
     get_one
@@ -228,7 +228,11 @@ def drawSP(runlengths_succ, runlengths_unsucc, percentiles,
        A single successful running length is computed by adding
        uniformly randomly chosen running lengths until the first time a
        successful one is chosen. In case of no successful run an
-       exception is raised.
+       exception is raised. The first chosen running lengths are
+       derandomized, see `randint_derandomized`, unless
+       ``derandomized is False``. All samples are computed at once, the
+       number of chosen unsuccessful running lengths after the first is
+       drawn from a geometric distribution.
 
     This implementation is depreciated and replaced by `simulated_evals`.
     The latter is also depreciated, see
@@ -268,7 +272,6 @@ def drawSP(runlengths_succ, runlengths_unsucc, percentiles,
     # geometric distribution for number of unsuccessful runs
     # The samplesize depends on the number of unsuccessful runs?
 
-    arrStats = []
     sdata = np.array(runlengths_succ)  # more efficient indexing
     sdata.sort()
     udata = np.array(runlengths_unsucc)  # more efficient indexing
@@ -277,19 +280,31 @@ def drawSP(runlengths_succ, runlengths_unsucc, percentiles,
     Ns = len(sdata)
     # data = np.r_[udata, sdata]
     N = Ns + Nu
+    samplesize = int(samplesize)
 
-    for idx in _randint_derandomized_generator(N, size=int(samplesize)):
-        # was: i in range(int(samplesize))
-        if not derandomized:
-            idx = np.random.randint(N)
-        assert 0 <= idx < N
-        sumdata = 0
-        while idx < Nu:
-            sumdata += udata[idx]
-            idx = np.random.randint(N)
-        sumdata += sdata[idx - Nu]  # add evals of the successful run
-        arrStats.append(sumdata)  # We know we have one success here.
-    arrStats.sort()
+    # the first run of each sample is drawn as before, the runs of the
+    # data are indexed by [0, Nu-1] for unsuccessful and [Nu, N-1] for
+    # successful runs
+    if derandomized:
+        idx = randint_derandomized(N, size=samplesize)
+    else:
+        idx = np.random.randint(N, size=samplesize)
+    failed = idx < Nu
+    nfailed = np.sum(failed)
+    arrStats = np.zeros(samplesize)
+    arrStats[failed] = udata[idx[failed]]
+    # after a first unsuccessful run, restarts are drawn until the first
+    # success, hence the number of further unsuccessful runs is
+    # geometrically distributed and each of them uniform in udata
+    nrestarts = np.random.geometric(Ns / float(N), nfailed) - 1
+    restarts = udata[np.random.randint(Nu, size=np.sum(nrestarts))] if Nu else []
+    arrStats += np.bincount(np.repeat(np.flatnonzero(failed), nrestarts),
+                            weights=restarts, minlength=samplesize)
+    # add evals of the successful run, uniform in sdata after a restart
+    isucc = idx - Nu
+    isucc[failed] = np.random.randint(Ns, size=nfailed)
+    arrStats += sdata[isucc]
+    arrStats = list(np.sort(arrStats))
     return (prctile(arrStats, percentiles, issorted=True),
             arrStats)
 
@@ -308,7 +323,7 @@ def randint_derandomized(low, high=None, size=None):
     >>> import numpy as np
     >>> from cocopp.toolsstats import randint_derandomized
     >>> np.random.seed(1)
-    >>> list(randint_derandomized(0, 4, 6))
+    >>> [int(i) for i in randint_derandomized(0, 4, 6)]
     [3, 2, 0, 1, 0, 2]
 
     A typical usecase is indexing of ``data`` like::
@@ -317,22 +332,37 @@ def randint_derandomized(low, high=None, size=None):
         # or almost equivalently
         np.asarray(data)[randint_derandomized(0, len(data), ndata)]
 
-    """
-    return np.asarray(list(_randint_derandomized_generator(low, high, size)))
+    With ``size=(m, n)``, an ``m x n`` array is returned whose rows are
+    the same as from `m` subsequent calls with ``size=n``. `low` and
+    `high` may then be sequences of length `m`, one value for each row:
+
+    >>> np.random.seed(1)
+    >>> randint_derandomized(0, [4, 2], (2, 6)).tolist()
+    [[3, 2, 0, 1, 0, 2], [0, 1, 0, 1, 1, 0]]
 
-def _randint_derandomized_generator(low, high=None, size=None):
-    """the generator for `randint_derandomized`"""
+    """
     if high is None:
         low, high = 0, low
     if size is None:
         size = high
-    delivered = 0
-    while delivered < size:
-        for randi in np.random.permutation(high - low):
-            delivered += 1
-            yield low + randi
-            if delivered >= size:
-                break
+    if np.ndim(size) == 0:
+        return _randint_derandomized_row(low, high, size)
+    m, n = size
+    res = np.zeros((m, n), dtype=int)
+    for i, (low_i, high_i) in enumerate(zip(np.broadcast_to(low, (m,)),
+                                            np.broadcast_to(high, (m,)))):
+        res[i] = _randint_derandomized_row(low_i, high_i, n)
+    return res
+
+def _randint_derandomized_row(low, high, size):
+    """return `size` integers from concatenated permutations of [low, high-1]"""
+    if size <= 0:
+        return np.zeros(0, dtype=int)
+    if high <= low:
+        raise ValueError("low=%s must be smaller than high=%s" % (str(low), str(high)))
+    n = high - low
+    return low + np.concatenate([np.random.permutation(n)
+                                 for _ in range((size + n - 1) // n)])[:size]
 
 def simulated_evals(evals, nfails,
             samplesize=genericsettings.simulated_runlength_bootstrap_sample_size,
@@ -524,29 +554,20 @@ def ranksum_statistic(N1, N2):
     """Returns the U test statistic of the rank-sum (Mann-Whitney-Wilcoxon) test. 
 
     http://en.wikipedia.org/wiki/Mann%E2%80%93Whitney_U
-    Small sample sizes (direct method).
+    Direct method, where the smaller and equal values in `N2` are found
+    by binary search in the sorted `N2`.
+
+    >>> from cocopp.toolsstats import ranksum_statistic
+    >>> ranksum_statistic([1, 3, 5], [2, 3, 4])
+    4.5
 
     """
-    # Possible optimization by setting sample 1 to be the one with the smallest
-    # rank.
-
-    # TODO: deal with more general type of sorting.
-    s1 = sorted(N1)
-    s2 = sorted(N2)
-    U = 0.
-    for i in s1:
-        Ui = 0.  # increment of U
-        for j in s2:
-            if j < i:
-                Ui += 1.
-            elif j == i:
-                Ui += .5
-            else:
-                break
-        # if Ui == 0.:
-            # break
-        U += Ui
-    return U
+    s2 = np.sort(np.asarray(N2, dtype=float).ravel())
+    x1 = np.asarray(N1, dtype=float).ravel()
+    x1 = x1[~np.isnan(x1)]  # nan is neither smaller nor equal
+    smaller = np.searchsorted(s2, x1, side='left')
+    smaller_or_equal = np.searchsorted(s2, x1, side='right')
+    return float(np.sum(smaller) + 0.5 * np.sum(smaller_or_equal - smaller))
 
 ###############################################################################
 # Copyrights from Gary Strangman due to inclusion of his code for the ranksumtest
@@ -624,17 +645,27 @@ def ranksumtest(x, y):
     in the two-tailed p-value. Should be test drived...
 
     Returns: z-value for first data set ``x`` and two-tailed p-value
-    
+
+    If ``x`` and ``y`` are 2-D arrays with the same number of rows, each
+    row pair is tested and arrays of z- and p-values are returned.
+
+    >>> import numpy as np
+    >>> from cocopp.toolsstats import ranksumtest
+    >>> z, p = ranksumtest([[1, 2, 3], [1, 2, 3]], [[4, 5, 6], [1, 2, 3]])
+    >>> np.round(z, 4).tolist(), np.round(p, 4).tolist()
+    ([-1.964, 0.0], [0.0495, 1.0])
+
     """
     x, y = map(np.asarray, (x, y))
-    n1 = len(x)
-    n2 = len(y)
-    alldata = np.concatenate((x, y))
-    ranked = rankdata(alldata)
-    x = ranked[:n1]
-    y = ranked[n1:]
-    s = np.sum(x, axis=0)
-    assert s + np.sum(y, axis=0) == np.sum(range(n1 + n2 + 1))
+    is_single_test = x.ndim < 2
+    x, y = np.atleast_2d(x), np.atleast_2d(y)
+    n1 = x.shape[1]
+    n2 = y.shape[1]
+    ranked = _rankdata_rows(np.hstack((x, y)))
+    s = np.sum(ranked[:, :n1], axis=1)
+    assert np.all(s + np.sum(ranked[:, n1:], axis=1) == np.sum(range(n1 + n2 + 1)))
+    if is_single_test:
+        s = s[0]
     expected = n1 * (n1 + n2 + 1) / 2.0
     z = (s - expected) / np.sqrt(n1 * n2 * (n1 + n2 + 1) / 12.0)
     prob = 2 * (1.0 - zprob(abs(z)))
@@ -658,23 +689,41 @@ def rankdata(a):
     Returns:
       An array of length equal to the size of a, containing rank scores.
 
+    >>> from cocopp.toolsstats import rankdata
+    >>> rankdata([[3, 2], [2, 0]]).tolist()
+    [4.0, 2.5, 2.5, 1.0]
+
+    `nan` values are ranked after all numbers and are never tied: each
+    `nan` gets its own rank, in the order of its position in `a`.
+
+    >>> rankdata([np.nan, 1, np.nan, 1]).tolist()
+    [3.0, 1.5, 4.0, 1.5]
+
     """
-    a = np.ravel(a)
-    n = len(a)
-    svec, ivec = fastsort(a)
-    sumranks = 0
-    dupcount = 0
-    newarray = np.zeros(n, float)
-    for i in range(n):
-        sumranks += i
-        dupcount += 1
-        if i == n - 1 or svec[i] != svec[i + 1]:
-            averank = sumranks / float(dupcount) + 1
-            for j in range(i - dupcount + 1, i + 1):
-                newarray[ivec[j]] = averank
-            sumranks = 0
-            dupcount = 0
-    return newarray
+    return _rankdata_rows(np.ravel(a).reshape(1, -1))[0]
+
+def _rankdata_rows(a):
+    """return the `rankdata` of each row of the 2-D array `a`.
+
+    Rows are sorted with a stable sort, hence `nan` values come last
+    in their original order and each `nan` gets its own rank.
+    """
+    a = np.asarray(a)
+    m, n = a.shape
+    if not a.size:
+        return np.zeros((m, n))
+    # sort all rows at once in a flat array, row by row
+    order = (np.argsort(a, axis=1, kind='mergesort') +
+             n * np.arange(m).reshape(-1, 1)).ravel()
+    sorted_a = a.ravel()[order]
+    is_first = np.ones(m * n, dtype=bool)  # first of a group of ties
+    is_first[1:] = sorted_a[1:] != sorted_a[:-1]
+    is_first[::n] = True
+    firsts = np.flatnonzero(is_first)
+    counts = np.diff(np.append(firsts, m * n))
+    ranks = np.zeros(m * n)
+    ranks[order] = np.repeat(firsts % n + (counts + 1) / 2., counts)
+    return ranks.reshape(m, n)
 
 def significancetest(entry0, entry1, targets):
     """Compute the rank-sum test between two data sets.
@@ -705,6 +754,7 @@ def significancetest(entry0, entry1, targets):
 
     bootstraps = False  # future extension
     res = []
+    curdata = [[], []]  # test data of each entry for each target
     evals = []
     refalgs = []
     isRefAlg = False
@@ -760,13 +810,7 @@ def significancetest(entry0, entry1, targets):
                         else:
                             FE_umin = np.inf
                         # Determine the function values for FE_umin
-                        prevline = np.array([np.inf] * (entry.funvals.shape[1] - 1))
-                        for curline in entry.funvals:
-                            # only works because the funvals are monotonous
-                            if curline[0] > FE_umin:
-                                break
-                            prevline = curline[1:]
-                        tmpfvalues = prevline.copy()
+                        tmpfvalues = _funvals_at(entry.funvals, FE_umin)
                         # tmpfvalues = entry.finalfunvals
                         # if (tmpfvalues != entry.finalfunvals).any():
                             # set_trace()
@@ -787,19 +831,10 @@ def significancetest(entry0, entry1, targets):
                     FE_umin = min(FE)
 
                     # 2) determine the function values for FE_umin
-                    fvalues = []
-                    for j, entry in enumerate((entry0, entry1)):
-                        prevline = np.array([np.inf] * entry.nbRuns())
-                        for curline in entry.funvals:
-                            # only works because the funvals are monotonous
-                            if curline[0] > FE_umin:
-                                break
-                            prevline = curline[1:]
-                        fvalues.append(prevline)
+                    fvalues = [_funvals_at(entry.funvals, FE_umin)
+                               for entry in (entry0, entry1)]
 
         # 2. 3. 4. Collect data for the significance test:
-        curdata = []  # current data 
-        
         try: fvalues
         except NameError: pass
         else:
@@ -816,12 +851,23 @@ def significancetest(entry0, entry1, targets):
                     "negative Df value(s) found ({}, offset={}) in DataSet {} in significance test line {}"
                     " for target[{}] = {}. This is a bug and may lead to a wrong significance result."
                     .format(-tmp[idx], f_offset, entry.info_str(targets), tmp, i, targets[i]))
-            curdata.append(tmp)
+            curdata[j].append(tmp)
             if np.isnan(tmp).any():
                 warnings.warn("{} contains nan values in significance test line {} for target[{}] = {}"
                               .format(entry.info_str(targets), tmp, i, targets[i]))
 
-        z_and_p = ranksumtest(curdata[0], curdata[1])
+    # one rank-sum test for all targets with the same number of data,
+    # which may differ between targets only for a reference algorithm
+    test_results = len(targets) * [None]
+    for lengths in set(zip(map(len, curdata[0]), map(len, curdata[1]))):
+        idx = [i for i in range(len(targets))
+               if (len(curdata[0][i]), len(curdata[1][i])) == lengths]
+        zs, ps = ranksumtest([curdata[0][i] for i in idx],
+                             [curdata[1][i] for i in idx])
+        for i, z, p in zip(idx, zs, ps):
+            test_results[i] = (z, p)
+    for i in range(len(targets)):
+        z_and_p = test_results[i]
         if isRefAlg:
             z_and_p = list(z_and_p)  # no idea what that is for
             z_and_p[1] /= 2.  # one-tailed p-value instead of two-tailed
@@ -843,6 +889,17 @@ def significancetest(entry0, entry1, targets):
     genericsettings.balance_instances = balance_instances_saved
     return res
 
+def _funvals_at(funvals, evals):
+    """return the function values of each trial after `evals` evaluations.
+
+    `funvals` is the `DataSet.funvals` array, its first column contains
+    increasing evaluations. Return `inf` values if ``evals < funvals[0, 0]``.
+    """
+    i = np.searchsorted(funvals[:, 0], evals, side='right')
+    if i == 0:
+        return np.array([np.inf] * (funvals.shape[1] - 1))
+    return funvals[i - 1, 1:].copy()
+
 def best_alg_indices(ert_ars=None, median_finalfunvals=None,
                      datasets=None, targets=None):
     """return the index of the most promising algorithm for each target.
@@ -892,22 +949,27 @@ def significance_all_best_vs_other(datasets, targets, best_alg_idx=None):
     significance_versus_others = []  # indexed by target index
     assert len(best_alg_idx) == len(targets)
     if len(datasets) > 1:
-        for itarget, target in enumerate(targets):
-            z_and_p = None
-            for ialg in range(len(datasets)):
-                if ialg == best_alg_idx[itarget]:
+        # loop over the algorithms first, such that a single call of
+        # significancetest tests all targets with the same best algorithm
+        significance_versus_others = len(targets) * [None]
+        is_decided = len(targets) * [False]  # an algorithm is better than best
+        for ialg in range(len(datasets)):
+            for ibest in sorted(set(best_alg_idx)):
+                itargets = [i for i in range(len(targets))
+                            if best_alg_idx[i] == ibest and not is_decided[i]]
+                if ialg == ibest or not itargets:
                     continue
-                z_and_p2 = significancetest(datasets[ialg],
-                                            datasets[best_alg_idx[itarget]], [target])[0]
-                if z_and_p2[0] >= 0:
-                    # found an algorithm that is better than best_alg_idx
-                    z_and_p = (z_and_p2[0], 1)
-                    break  # no need to check other algorithms
-                if z_and_p is None or z_and_p2[1] > z_and_p[1]:
-                    # when z was always < 0, ie all algorithms so far were indeed worse
-                    # then look for strongest opponent, ie weakest p (closest to 1)
-                    z_and_p = z_and_p2 
-            significance_versus_others.append(z_and_p)
+                for itarget, z_and_p2 in zip(itargets, significancetest(
+                        datasets[ialg], datasets[ibest], [targets[i] for i in itargets])):
+                    z_and_p = significance_versus_others[itarget]
+                    if z_and_p2[0] >= 0:
+                        # found an algorithm that is better than best_alg_idx
+                        significance_versus_others[itarget] = (z_and_p2[0], 1)
+                        is_decided[itarget] = True  # no need to check other algorithms
+                    elif z_and_p is None or z_and_p2[1] > z_and_p[1]:
+                        # when z was always < 0, ie all algorithms so far were indeed worse
+                        # then look for strongest opponent, ie weakest p (closest to 1)
+                        significance_versus_others[itarget] = z_and_p2
     return significance_versus_others, best_alg_idx
 
 def fastsort(a):
@@ -3,13 +3,61 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import os
 import argparse
+import numpy as np
+from itertools import islice
+from multiprocessing import Pool
 
 from cocoprep.archive_load_data import parse_range, create_path, remove_empty_file
 from cocoprep.archive_load_data import get_file_name_list, parse_archive_file_name, parse_problem_instance_file_name
 from cocoprep.archive_exceptions import PreprocessingException, PreprocessingWarning
 
 
-def summary_analysis(input_path, output_file, lower_bound, upper_bound, functions, instances, dimensions):
+def get_extreme_values(input_file, dimension, lower_bound, upper_bound, chunk_size=10000):
+    """Returns the lowest and highest decision space values of each variable in the given analysis file, where the
+       lowest values are at most lower_bound and the highest values at least upper_bound. The file is read in chunks
+       of chunk_size lines (to bound the memory), which are converted into 2-D arrays and reduced with NumPy.
+       :param input_file: analysis file name
+       :param dimension: dimension of the problem
+       :param lower_bound: lower bound
+       :param upper_bound: upper bound
+       :param chunk_size: number of lines read at once
+    """
+    column_start = 3
+    column_end = 3 + dimension
+
+    lowest = np.array([float(lower_bound)] * dimension)
+    highest = np.array([float(upper_bound)] * dimension)
+
+    with open(input_file, 'r') as f_in:
+        while True:
+            lines = list(islice(f_in, chunk_size))
+            if len(lines) == 0:
+                break
+            try:
+                values = np.loadtxt(lines, usecols=range(column_start, column_end), comments=None, ndmin=2)
+            except ValueError:
+                # Some lines have missing values, which are replaced by nan (and thus ignored)
+                values = [line.split()[column_start:column_end] for line in lines]
+                values = np.array([row + ['nan'] * (dimension - len(row)) for row in values], dtype=float)
+            if len(values) == 0:
+                continue
+            chunk_lowest = np.fmin.reduce(values, axis=0)
+            chunk_highest = np.fmax.reduce(values, axis=0)
+            lowest = np.where(chunk_lowest < lowest, chunk_lowest, lowest)
+            highest = np.where(chunk_highest > highest, chunk_highest, highest)
+        f_in.close()
+
+    return lowest, highest
+
+
+def _get_extreme_values_star(args):
+    """Calls get_extreme_values with the given tuple of arguments (needed by Pool.imap).
+    """
+    return get_extreme_values(*args)
+
+
+def summary_analysis(input_path, output_file, lower_bound, upper_bound, functions, instances, dimensions,
+                     workers=1):
     """
     Creates a summary of the analysis files from the input_path folder, which contain data in the following format:
     [evaluation_number] [objective space values] [decision space values]
@@ -18,6 +66,7 @@ def summary_analysis(input_path, output_file, lower_bound, upper_bound, function
     [file_name] [lowest_value1] ... [lowest_valueD]
     [file_name] [highest_value1] ... [highest_valueD]
     If none of the decision space values went beyond one of the bounds, no output is done.
+    If workers > 1, the files are read by this number of processes (the output is the same).
     """
 
     # Check whether input path exits
@@ -25,47 +74,51 @@ def summary_analysis(input_path, output_file, lower_bound, upper_bound, function
     if len(input_files) == 0:
         raise PreprocessingException('Folder {} does not exist or is empty'.format(input_path))
 
-    # Read the input files one by one and save the result in the output_file
-    with open(output_file, 'a') as f_out:
-        for input_file in input_files:
+    problems = []
+    tasks = []
+    for input_file in input_files:
 
-            try:
-                (suite_name, function, instance, dimension) = parse_problem_instance_file_name(input_file)
-                if (function not in functions) or (instance not in instances) or (dimension not in dimensions):
-                    continue
-            except PreprocessingWarning as warning:
-                print('Skipping file {}\n{}'.format(input_file, warning))
+        try:
+            (suite_name, function, instance, dimension) = parse_problem_instance_file_name(input_file)
+            if (function not in functions) or (instance not in instances) or (dimension not in dimensions):
                 continue
+        except PreprocessingWarning as warning:
+            print('Skipping file {}\n{}'.format(input_file, warning))
+            continue
+
+        problems.append((input_file, '{}_f{:02d}_i{:02d}_d{:02d}'.format(suite_name, function, instance, dimension)))
+        tasks.append((input_file, dimension, lower_bound, upper_bound))
+
+    if workers > 1 and len(tasks) > 1:
+        pool = Pool(min(workers, len(tasks)))
+        # imap returns the results in the order of the input files
+        results = pool.imap(_get_extreme_values_star, tasks)
+    else:
+        pool = None
+        results = (get_extreme_values(*task) for task in tasks)
+
+    # Save the results in the output_file in the order of the input files
+    with open(output_file, 'a') as f_out:
+        for (input_file, problem_name), (lowest, highest) in zip(problems, results):
 
             print(input_file)
-            column_start = 3
-            column_end = 3 + dimension
-
-            lowest = [float(lower_bound)] * dimension
-            highest = [float(upper_bound)] * dimension
-
-            with open(input_file, 'r') as f_in:
-                for line in f_in:
-                    for idx, number in enumerate(line.split()[column_start:column_end]):
-                        num = float(number)
-                        if num > highest[idx]:
-                            highest[idx] = num
-                        if num < lowest[idx]:
-                            lowest[idx] = num
-                f_in.close()
-
-            f_out.write('{}_f{:02d}_i{:02d}_d{:02d}'.format(suite_name, function, instance, dimension))
+
+            f_out.write(problem_name)
             for number in lowest:
                 f_out.write('\t{:.8E}'.format(number))
             f_out.write('\n')
 
-            f_out.write('{}_f{:02d}_i{:02d}_d{:02d}'.format(suite_name, function, instance, dimension))
+            f_out.write(problem_name)
             for number in highest:
                 f_out.write('\t{:.8E}'.format(number))
             f_out.write('\n')
 
         f_out.close()
 
+    if pool is not None:
+        pool.close()
+        pool.join()
+
 
 def archive_analysis(input_paths, output_path, lower_bound, upper_bound, functions, instances, dimensions):
     """Records all instances from the archives found in input_paths where any decision space value is lower than the
@@ -140,6 +193,8 @@ if __name__ == '__main__':
                         help='lower bound of the decision space')
     parser.add_argument('-u', '--upper_bound', type=float, default=5.0,
                         help='upper bound of the decision space')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes used to summarize the analysis files')
     parser.add_argument('output', help='path to the output folder')
     parser.add_argument('summary', help='file name for the summary')
     parser.add_argument('input',  help='path to the input folder')
@@ -157,4 +212,4 @@ if __name__ == '__main__':
     timing.log('Finished reading data', timing.now())
 
     summary_analysis(args.output, args.summary, args.lower_bound, args.upper_bound, args.functions, args.instances,
-                     args.dimensions)
+                     args.dimensions, args.workers)
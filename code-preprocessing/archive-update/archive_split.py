@@ -5,7 +5,7 @@ import os
 import argparse
 
 from cocoprep.archive_load_data import parse_archive_file_name, parse_range
-from cocoprep.archive_load_data import create_path, get_key_value, get_file_name_list
+from cocoprep.archive_load_data import create_path, get_file_name_list, get_instance_blocks, read_instance_block
 from cocoprep.archive_exceptions import PreprocessingException, PreprocessingWarning
 
 
@@ -33,51 +33,23 @@ def archive_split(input_paths, output_path, functions, instances, dimensions):
             continue
 
         print(input_file)
-        f_out = None
-        instance = None
 
-        with open(input_file, 'r') as f_in:
-
-            buffered_lines = ''
-
-            for line in f_in:
-                if not line.strip():
+        # Use the index of instance blocks to read only the wanted instances
+        for block in get_instance_blocks(input_file):
+            instance = block[0]
+            if not instance or instance not in instances:
+                continue
+            output_file = os.path.join(output_path,
+                                       '{}_f{:02d}_i{:02d}_d{:02d}_nondominated.adat'.format(suite_name,
+                                                                                             function,
+                                                                                             instance,
+                                                                                             dimension))
+            with open(output_file, 'w') as f_out:
+                for line in read_instance_block(input_file, block):
                     # Ignore empty lines
-                    continue
-
-                elif line[0] == '%':
-                    if 'instance' in line:
-                        if f_out and not f_out.closed:
-                            if len(buffered_lines) > 0:
-                                f_out.write(buffered_lines)
-                                buffered_lines = ''
-                            f_out.close()
-                        instance = int(get_key_value(line[1:], 'instance'))
-                        if instance in instances:
-                            output_file = os.path.join(output_path,
-                                                       '{}_f{:02d}_i{:02d}_d{:02d}_nondominated.adat'.format(suite_name,
-                                                                                                             function,
-                                                                                                             instance,
-                                                                                                             dimension))
-                            f_out = open(output_file, 'w')
-                        else:
-                            instance = None
-
-                    if instance:
-                        buffered_lines += line
-
-                elif (line[0] != '%') and instance:
-                    if len(buffered_lines) > 0:
-                        f_out.write(buffered_lines)
-                        buffered_lines = ''
-                    f_out.write(line)
-
-            f_in.close()
-
-        if f_out and not f_out.closed:
-            if len(buffered_lines) > 0:
-                f_out.write(buffered_lines)
-            f_out.close()
+                    if line.strip():
+                        f_out.write(line)
+                f_out.close()
 
 
 if __name__ == '__main__':
@@ -3,6 +3,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import os
 import argparse
+import numpy as np
+from itertools import compress
 
 from cocoprep.archive_load_data import get_file_name_list, parse_archive_file_name
 from cocoprep.archive_load_data import create_path, parse_range
@@ -10,8 +12,63 @@ from cocoprep.archive_exceptions import PreprocessingException, PreprocessingWar
 from cocoprep.coco_archive import Archive, log_level
 
 
+def round_to_grid(objectives, ideal, normalization, thinning_precision):
+    """Returns the objectives (an array of shape (n, 2)) rounded according to the thinning precision in the
+       normalized objective space.
+    """
+    f_normalized = (objectives - ideal) / normalization
+    return ideal + np.round(f_normalized / thinning_precision) * thinning_precision
+
+
+def thin_in_memory(input_file, f_out, thinned_archive, ideal, normalization, thinning_precision,
+                   currently_nondominated):
+    """Reads all solutions of the input file at once, rounds them with NumPy and feeds only the first solution of
+       each grid cell to the thinned archive (later solutions of the same cell cannot update the archive, since they
+       are equal to the first one). Writes the comments and, if currently_nondominated is True, the lines of the
+       solutions that updated the archive to f_out in the order of the input file. Returns the number of all
+       solutions and the number of output solutions.
+    """
+    with open(input_file, 'r') as f_in:
+        all_lines = f_in.readlines()
+        f_in.close()
+
+    all_solutions = 0
+    solution_indices = []
+    objectives = []
+    output = np.zeros(len(all_lines), dtype=bool)
+    for i, line in enumerate(all_lines):
+        if line[0] == '%':
+            output[i] = True
+            continue
+        # Only the first three values are needed (splitting all values of long lines is much slower)
+        split = line.split(None, 3)
+        if len(split) < 3:
+            continue
+        all_solutions += 1
+        if split[0] != '0':
+            # The line contains a 'regular' solution (extreme solutions are ignored)
+            solution_indices.append(i)
+            objectives.extend(split[1:3])
+
+    thinned_solutions = 0
+    if len(solution_indices) > 0:
+        objectives = np.array(objectives, dtype=float).reshape(-1, 2)
+        f_rounded = round_to_grid(objectives, ideal, normalization, thinning_precision)
+        # The first solution of each grid cell in the order of the input file (viewing the two objectives as one
+        # complex number is much faster than np.unique with axis=0)
+        first = np.sort(np.unique(f_rounded.view(np.complex128).ravel(), return_index=True)[1])
+        updated = thinned_archive.add_solutions(f_rounded[first], [all_lines[solution_indices[i]] for i in first])
+        if currently_nondominated:
+            output[np.asarray(solution_indices)[first[updated]]] = True
+            thinned_solutions = int(np.sum(updated))
+
+    for line in compress(all_lines, output):
+        f_out.write(line)
+    return all_solutions, thinned_solutions
+
+
 def archive_thinning(input_path, output_path, thinning_precision, currently_nondominated, functions, instances,
-                     dimensions):
+                     dimensions, batch_size=100000, in_memory=False):
     """Performs thinning of all the archives in the input path and stores the thinned archives in the output path.
        Assumes one file contains one archive.
 
@@ -20,6 +77,10 @@ def archive_thinning(input_path, output_path, thinning_precision, currently_nond
        are currently nondominated within the thinned archive are output. The two extreme solutions are not output.
        If currently_nondominated is False, only the solutions that are contained in the final archive are output.
        In this case, the two extreme solutions are also output.
+
+       The solutions are fed to the thinned archive in batches of batch_size solutions. If in_memory is True, each
+       archive is instead read at once and only the first solution of each grid cell is fed to the thinned archive
+       (with the same result, but much faster for large archives).
     """
     # Check whether input path exists
     input_files = get_file_name_list(input_path, ".adat")
@@ -54,42 +115,59 @@ def archive_thinning(input_path, output_path, thinning_precision, currently_nond
         extreme2_text = thinned_archive.get_next_solution_text()
         extreme1 = [float(x) for x in extreme1_text.split()[1:3]]
         extreme2 = [float(x) for x in extreme2_text.split()[1:3]]
-        ideal = [min(x, y) for x, y in zip(extreme1, extreme2)]
-        nadir = [max(x, y) for x, y in zip(extreme1, extreme2)]
-        normalization = [x - y for x, y in zip(nadir, ideal)]
-
-        with open(input_file, 'r') as f_in:
-            for line in f_in:
-
-                if line[0] == '%':
+        ideal = np.minimum(extreme1, extreme2)
+        nadir = np.maximum(extreme1, extreme2)
+        normalization = nadir - ideal
+
+        objectives = []
+        lines = []
+
+        def add_solutions(objectives, lines):
+            """Feeds the rounded objectives of the solutions to the thinned archive and, if currently_nondominated is
+               True, outputs the lines of those that updated the archive. Returns the number of output lines.
+            """
+            # Fill the archives with the rounded solutions values wrt the different precisions
+            f_rounded = round_to_grid(np.array(objectives), ideal, normalization, thinning_precision)
+            updated = thinned_archive.add_solutions(f_rounded, lines)
+            if currently_nondominated:
+                for line in compress(lines, updated):
                     f_out.write(line)
+                return int(np.sum(updated))
+            return 0
+
+        if in_memory:
+            (all_solutions, thinned_solutions) = thin_in_memory(input_file, f_out, thinned_archive, ideal,
+                                                                normalization, thinning_precision,
+                                                                currently_nondominated)
+        else:
+            with open(input_file, 'r') as f_in:
+                for line in f_in:
+
+                    if line[0] == '%':
+                        if len(lines) > 0:
+                            thinned_solutions += add_solutions(objectives, lines)
+                            objectives, lines = [], []
+                        f_out.write(line)
+
+                    elif len(line) == 0 or len(line.split()) < 3:
+                        continue
 
-                elif len(line) == 0 or len(line.split()) < 3:
-                    continue
-
-                elif line.split()[0] == '0':
-                    # The line contains an extreme solution, do nothing
-                    all_solutions += 1
-                    continue
-
-                else:
-                    # The line contains a 'regular' solution
-                    try:
-                        # Fill the archives with the rounded solutions values wrt the different precisions
-                        f_original = [float(x) for x in line.split()[1:3]]
-                        f_normalized = [(f_original[i] - ideal[i]) / normalization[i] for i in range(2)]
-                        f_normalized = [round(f_normalized[i] / thinning_precision) for i in range(2)]
-                        f_normalized = [ideal[i] + f_normalized[i] * thinning_precision for i in range(2)]
-                        updated = thinned_archive.add_solution(f_normalized[0], f_normalized[1], line)
-                    except IndexError:
-                        print('Problem in file {}, line {}, skipping line'.format(input_file, line))
+                    elif line.split()[0] == '0':
+                        # The line contains an extreme solution, do nothing
+                        all_solutions += 1
                         continue
-                    finally:
+
+                    else:
+                        # The line contains a 'regular' solution
+                        objectives.append([float(x) for x in line.split()[1:3]])
+                        lines.append(line)
                         all_solutions += 1
+                        if len(lines) >= batch_size:
+                            thinned_solutions += add_solutions(objectives, lines)
+                            objectives, lines = [], []
 
-                    if currently_nondominated and (updated == 1):
-                        thinned_solutions += 1
-                        f_out.write(line)
+            if len(lines) > 0:
+                thinned_solutions += add_solutions(objectives, lines)
 
         if not currently_nondominated and (thinned_archive.number_of_solutions == 2):
             # Output the two extreme solutions if they are the only two in the archive
@@ -131,15 +209,19 @@ if __name__ == '__main__':
                         help='thinning precision')
     parser.add_argument('--currently-nondominated', action='store_true',
                         help='output currently nondominated solutions')
+    parser.add_argument('--in-memory', action='store_true',
+                        help='read each archive at once and feed only one solution per grid cell to the archive')
     parser.add_argument('output', help='path to the output folder')
     parser.add_argument('input', help='path to the input folder')
     args = parser.parse_args()
 
     print('Program called with arguments: \ninput folder = {}\noutput folder = {}'.format(args.input, args.output))
     print('functions = {} \ninstances = {}\ndimensions = {}'.format(args.functions, args.instances, args.dimensions))
-    print('precision = {} \ncurrently-nondominated = {}\n'.format(args.precision, args.currently_nondominated))
+    print('precision = {} \ncurrently-nondominated = {}\nin-memory = {}\n'.format(args.precision,
+                                                                               args.currently_nondominated,
+                                                                               args.in_memory))
 
     # Analyze the archives
     archive_thinning(args.input, args.output, args.precision, args.currently_nondominated, args.functions,
-                     args.instances, args.dimensions)
+                     args.instances, args.dimensions, in_memory=args.in_memory)
 
@@ -4,8 +4,9 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import os
 import sys
 import argparse
+from multiprocessing import Pool
 
-from cocoprep.archive_load_data import parse_range, read_best_values, write_best_values
+from cocoprep.archive_load_data import create_path, parse_range, read_best_values, write_best_values
 from cocoprep.archive_functions import ArchiveInfo
 from cocoprep.coco_archive import Archive, log_level
 
@@ -55,7 +56,39 @@ def update_best_hypervolume(old_best_files, new_best_data, new_best_file):
     sys.stdout.flush()
 
 
-def merge_archives(input_path, output_path, functions, instances, dimensions, crop_variables):
+def merge_problem_instance(problem_instance_info, output_path, crop_variables, persist_index=False):
+    """Merges all archives of the given problem instance (removes any dominated solutions) and stores the
+       consolidated archive in the output_path. Returns the problem name and its new best hypervolume value.
+       :param problem_instance_info: ProblemInstanceInfo of the problem instance
+       :param output_path: output path (created if not existing before)
+       :param crop_variables: whether output archives should contain information on solution variables
+       :param persist_index: whether the index of instance blocks of multi-instance files should be stored next to
+       (and reused from) the files
+    """
+    old_level = log_level('warning')
+
+    # Create an archive for this problem instance
+    archive = Archive(problem_instance_info.suite_name, problem_instance_info.function,
+                      problem_instance_info.instance, problem_instance_info.dimension)
+
+    # Read the solutions from the files and add them to the archive
+    problem_instance_info.fill_archive(archive, persist_index)
+
+    # Write the non-dominated solutions into output folder
+    problem_instance_info.write_archive_solutions(output_path, archive, crop_variables)
+
+    log_level(old_level)
+    return str(problem_instance_info), archive.hypervolume
+
+
+def _merge_problem_instance_star(args):
+    """Calls merge_problem_instance with the given tuple of arguments (needed by Pool.imap).
+    """
+    return merge_problem_instance(*args)
+
+
+def merge_archives(input_path, output_path, functions, instances, dimensions, crop_variables, workers=1,
+                   persist_index=False):
     """Merges all archives from the input_path (removes any dominated solutions) and stores the consolidated archives
        in the output_path. Returns problem names and their new best hypervolume values in the form of a dictionary.
        :param input_path: input path
@@ -64,38 +97,50 @@ def merge_archives(input_path, output_path, functions, instances, dimensions, cr
        :param instances: instances to be included in the merging
        :param dimensions: dimensions to be included in the merging
        :param crop_variables: whether output archives should contain information on solution variables
+       :param workers: number of processes reading archive information and merging problem instances in parallel
+       (each problem instance is merged by a single process into its own output file, the results are the same as
+       with workers=1)
+       :param persist_index: whether the index of instance blocks of multi-instance files should be stored next to
+       (and reused from) the files
     """
     result = {}
 
     print('Reading archive information...')
     sys.stdout.flush()
-    archive_info = ArchiveInfo(input_path, functions, instances, dimensions)
+    archive_info = ArchiveInfo(input_path, functions, instances, dimensions, workers=workers)
 
-    print('Processing archives...')
-    sys.stdout.flush()
+    tasks = []
     while True:
         # Get information about the next problem instance
         problem_instance_info = archive_info.get_next_problem_instance_info()
         if problem_instance_info is None:
             break
+        tasks.append((problem_instance_info, output_path, crop_variables, persist_index))
 
-        old_level = log_level('warning')
-
-        # Create an archive for this problem instance
-        archive = Archive(problem_instance_info.suite_name, problem_instance_info.function,
-                          problem_instance_info.instance, problem_instance_info.dimension)
-
-        # Read the solutions from the files and add them to the archive
-        problem_instance_info.fill_archive(archive)
-
-        # Write the non-dominated solutions into output folder
-        problem_instance_info.write_archive_solutions(output_path, archive, crop_variables)
-
-        result.update({str(problem_instance_info): archive.hypervolume})
-        print('{}: {:.15f}'.format(problem_instance_info, archive.hypervolume))
-        sys.stdout.flush()
+    print('Processing archives...')
+    sys.stdout.flush()
+    if workers > 1 and len(tasks) > 1:
+        # Create the output path beforehand to avoid concurrent attempts
+        create_path(output_path)
+        pool = Pool(min(workers, len(tasks)))
+        # imap returns the results in the order of the tasks
+        merged = pool.imap(_merge_problem_instance_star, tasks, chunksize=1)
+    else:
+        pool = None
+        merged = (merge_problem_instance(*task) for task in tasks)
 
-        log_level(old_level)
+    try:
+        for problem_name, hypervolume in merged:
+            result.update({problem_name: hypervolume})
+            print('{}: {:.15f}'.format(problem_name, hypervolume))
+            sys.stdout.flush()
+    except BaseException:
+        if pool is not None:
+            pool.terminate()
+        raise
+    if pool is not None:
+        pool.close()
+        pool.join()
 
     return result
 
@@ -123,6 +168,11 @@ if __name__ == '__main__':
                         help='don\'t include information on the variables in the output archives')
     parser.add_argument('--hyp-file', default='new_best_values_hyp.c',
                         help='name of the file to store new hypervolume values')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes used to merge the archives of different problem instances')
+    parser.add_argument('--persist-index', action='store_true',
+                        help='store the index of instances of multi-instance input files next to the files as '
+                             '<file>.idx to speed up later runs (reused while the file is unchanged)')
     parser.add_argument('output', help='path to the output folder')
     parser.add_argument('input', default=[], nargs='+', help='path(s) to the input folder(s)')
     args = parser.parse_args()
@@ -132,7 +182,7 @@ if __name__ == '__main__':
 
     # Merge the archives
     new_hypervolumes = merge_archives(args.input, args.output, args.functions, args.instances, args.dimensions,
-                                      args.crop_variables)
+                                      args.crop_variables, args.workers, args.persist_index)
 
     timing.log('Finished merging', timing.now())
 
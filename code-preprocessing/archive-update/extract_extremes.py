@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
 import argparse
 
-from cocoprep.archive_load_data import get_file_name_list, parse_archive_file_name, get_key_value, parse_range
+from cocoprep.archive_load_data import get_file_name_list, parse_archive_file_name, parse_range
+from cocoprep.archive_load_data import get_instance_blocks, read_instance_block
 from cocoprep.archive_exceptions import PreprocessingException, PreprocessingWarning
 
 
@@ -37,14 +39,21 @@ def extract_extremes(input_paths, output_file, functions, instances, dimensions)
 
             print(input_file)
 
-            with open(input_file, 'r') as f_in:
+            # Read only the first lines of each instance block (lines before the first block belong to the instance
+            # from the file name)
+            blocks = get_instance_blocks(input_file)
+            start = blocks[0][1] if len(blocks) > 0 else os.path.getsize(input_file)
+            if start > 0:
+                blocks = [[instance, 0, start]] + blocks
+
+            for block in blocks:
+                instance = block[0]
                 extreme1 = None
                 count = 0
-                for line in f_in:
+                for line in read_instance_block(input_file, block):
                     if line[0] == '%' and 'instance' in line:
-                        instance = int(get_key_value(line[1:], 'instance').strip(' \t\n\r'))
                         count = 0
-                    elif count > 1 or (len(line) == 0) or line[0] == '%':
+                    elif (len(line) == 0) or line[0] == '%':
                         continue
                     elif count == 0:
                         extreme1 = line.split()[1:3]
@@ -58,9 +67,10 @@ def extract_extremes(input_paths, output_file, functions, instances, dimensions)
                             f_out.write(string)
                         except ValueError:
                             print('Skipping instance {} in file {}'.format(instance, input_file))
+                        # The remaining lines of the block are not needed
+                        break
 
-                f_in.close()
-                f_out.flush()
+            f_out.flush()
         f_out.close()
 
 
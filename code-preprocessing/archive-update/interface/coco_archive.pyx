@@ -70,6 +70,26 @@ cdef class Archive:
             self.up_to_date = False            
         return updated
         
+    def add_solutions(self, F, texts):
+        """Adds the solutions with objective values in the rows of F (of shape (n, 2)) and the corresponding n
+           texts to the archive in a single call. Returns a NumPy array of n bools, which is True where the solution
+           updated the archive (at the time it was added, as with add_solution).
+        """
+        cdef np.ndarray[double, ndim=2] _F = np.asarray(F, dtype=np.float64)
+        cdef Py_ssize_t n = _F.shape[0]
+        cdef np.ndarray[np.uint8_t, ndim=1] updated = np.zeros(n, dtype=np.uint8)
+        cdef Py_ssize_t i
+        cdef bytes text
+        if _F.shape[1] != 2 or len(texts) != n:
+            raise ValueError('F must be of shape (n, 2) and texts of length n')
+        for i in range(n):
+            text = _bstring(texts[i])
+            updated[i] = coco_archive_add_solution(self.archive, _F[i, 0], _F[i, 1], text) != 0
+        result = updated.astype(bool)
+        if result.any():
+            self.up_to_date = False
+        return result
+
     def get_next_solution_text(self):
         self._tmp_text = coco_archive_get_next_solution_text(self.archive)
         tmp_text = self._tmp_text.decode('ascii')
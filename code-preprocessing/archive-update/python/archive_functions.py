@@ -2,9 +2,12 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import os
 import sys
+import numpy as np
+from multiprocessing import Pool
 
 from .archive_exceptions import PreprocessingWarning, PreprocessingException
-from .archive_load_data import create_path, get_key_value, get_file_name_list, get_archive_file_info, get_range
+from .archive_load_data import create_path, get_file_name_list, get_archive_file_info, get_range
+from .archive_load_data import get_instance_blocks, read_instance_block
 
 
 class ProblemInstanceInfo:
@@ -12,6 +15,8 @@ class ProblemInstanceInfo:
        with archived solutions for this problem instance.
     """
 
+    batch_size = 100000  # number of solutions fed to the archive at once by fill_archive
+
     def __init__(self, _file_name, single_instance, suite_name, _function, instance, dimension):
         """Instantiates a ProblemInstanceInfo object.
         """
@@ -46,56 +51,60 @@ class ProblemInstanceInfo:
             return False
         return True
 
-    def fill_archive(self, archive):
+    def fill_archive(self, archive, persist_index=False):
         """Reads the solutions from the files and feeds them to the given archive. If a file contains a single
-        instance, all comments are skipped. If a file contains multiple instances, only the solutions up to the next
-        instance are read. If the file contains no solutions for the given problem instance, an exception is raised.
+        instance, all comments are skipped. If a file contains multiple instances, only the solutions of the (first)
+        block of this instance are read, which is found using the index of instance blocks of the file. If the file
+        contains no solutions for the given problem instance, an exception is raised.
            :param archive: archive to be filled with solutions
+           :param persist_index: whether the index of instance blocks should be stored next to the file
         """
         for f_info in self.file_info:
             f_name = f_info.get('file_name')
             single_instance = f_info.get('single_instance')
-            with open(f_name, 'r') as f:
 
-                instance_found = single_instance
-                solution_found = False
+            if single_instance:
+                lines = open(f_name, 'r')
+            else:
+                blocks = [block for block in get_instance_blocks(f_name, persist_index) if block[0] == self.instance]
+                if len(blocks) == 0:
+                    raise PreprocessingException('File \'{}\' does not contain \'instance = {}\''.format(
+                        f_name, self.instance))
+                lines = read_instance_block(f_name, blocks[0])
 
-                for line in f:
-                    if not line.strip() or (single_instance and line[0] == '%'):
-                        # Ignore empty lines and all comments if the file contains a single instance
+            solution_found = False
+            objectives = []
+            texts = []
+            try:
+                for line in lines:
+                    if not line.strip() or line[0] == '%':
+                        # Ignore empty lines and comments
                         continue
 
-                    elif line[0] == '%' and 'instance' not in line:
-                        # If a file has multiple instances, ignore all comments not containing instance information
+                    # Solution found, feed it (later) to the archive
+                    split = line.split()
+                    try:
+                        objectives.append((float(split[1]), float(split[2])))
+                        texts.append(line)
+                        solution_found = True
+                    except IndexError:
+                        print('Problem in file {}, line {}, skipping line'.format(f_name, line))
+                        sys.stdout.flush()
                         continue
 
-                    elif not single_instance and line[0] == '%' and 'instance' in line:
-                        if instance_found:
-                            # If a file has multiple instances, stop when you encounter another instance
-                            break
-                        else:
-                            value = get_key_value(line[1:], 'instance')
-                            if int(value) == self.instance:
-                                instance_found = True
-
-                    elif instance_found:
-                        if line[0] != '%':
-                            # Solution found, feed it to the archive
-                            try:
-                                archive.add_solution(float(line.split()[1]), float(line.split()[2]), line)
-                                solution_found = True
-                            except IndexError:
-                                print('Problem in file {}, line {}, skipping line'.format(f_name, line))
-                                sys.stdout.flush()
-                                continue
-
-                f.close()
-                if not instance_found:
-                    raise PreprocessingException('File \'{}\' does not contain \'instance = {}\''.format(f_name,
-                                                                                                         self.instance))
-                if not solution_found:
-                    raise PreprocessingException('File \'{}\' contains no solutions for \'instance = {}\''.format(
-                        f_name, self.instance))
+                    if len(texts) >= self.batch_size:
+                        archive.add_solutions(np.array(objectives), texts)
+                        objectives = []
+                        texts = []
+            finally:
+                if single_instance:
+                    lines.close()
+            if len(texts) > 0:
+                archive.add_solutions(np.array(objectives), texts)
+
+            if not solution_found:
+                raise PreprocessingException('File \'{}\' contains no solutions for \'instance = {}\''.format(
+                    f_name, self.instance))
 
     # noinspection PyTypeChecker
     def write_archive_solutions(self, output_path, archive, crop_variables):
@@ -129,13 +138,16 @@ class ArchiveInfo:
     """Collects information on the problem instances contained in all archives.
     """
 
-    def __init__(self, input_paths, functions, instances, dimensions, output_files=True):
+    def __init__(self, input_paths, functions, instances, dimensions, output_files=True, workers=1):
         """Instantiates an ArchiveInfo object.
            Extracts information from all archives found in the input_paths that correspond to the given functions,
-           instances and dimensions. Returns the resulting ArchiveInfo.
+           instances and dimensions. Returns the resulting ArchiveInfo. If workers > 1, the archive files are scanned
+           by this number of processes (the result is the same).
         """
 
         self.problem_instances = []
+        # Maps (suite_name, function, instance, dimension) to the ProblemInstanceInfo in self.problem_instances
+        self.problem_instance_dict = {}
         self.current_instance = 0
         count = 0
 
@@ -144,21 +156,31 @@ class ArchiveInfo:
         if len(input_files) == 0:
             raise PreprocessingException('Folder \'{}\' does not exist or is empty'.format(input_paths))
 
-        archive_info_list = []
-        for input_file in input_files:
-            try:
-                archive_info_set = get_archive_file_info(input_file, functions, instances, dimensions)
-                if archive_info_set is not None and len(archive_info_set) > 0:
-                    archive_info_list.append(archive_info_set)
-                    count += 1
-                    if output_files:
-                        print(input_file)
-                        sys.stdout.flush()
+        tasks = [(input_file, functions, instances, dimensions) for input_file in input_files]
+        if workers > 1 and len(tasks) > 1:
+            pool = Pool(min(workers, len(tasks)))
+            # imap returns the results in the order of the input files
+            file_infos = pool.imap(_get_archive_file_info_or_warning, tasks, chunksize=16)
+        else:
+            pool = None
+            file_infos = (_get_archive_file_info_or_warning(task) for task in tasks)
 
+        archive_info_list = []
+        for input_file, (archive_info_set, warning) in zip(input_files, file_infos):
             # If any problems are encountered, the file is skipped
-            except PreprocessingWarning as warning:
+            if warning is not None:
                 print(warning)
                 sys.stdout.flush()
+            elif archive_info_set is not None and len(archive_info_set) > 0:
+                archive_info_list.append(archive_info_set)
+                count += 1
+                if output_files:
+                    print(input_file)
+                    sys.stdout.flush()
+
+        if pool is not None:
+            pool.close()
+            pool.join()
 
         print('Successfully processed archive information from {} files.'.format(count))
 
@@ -181,17 +203,15 @@ class ArchiveInfo:
            of problem instances if an instance with these exact values does not exist yet. If it already exists, the
            current file_name and single_instance entries are added to its list of file information dictionaries.
         """
-
-        found = False
-        for problem_instance in self.problem_instances:
-            if problem_instance.equals(suite_name, _function, instance, dimension):
-                problem_instance.file_info.append({'file_name': _file_name, 'single_instance': single_instance})
-                found = True
-                break
-
-        if not found:
-            self.problem_instances.append(ProblemInstanceInfo(_file_name, single_instance, suite_name, _function,
-                                                              instance, dimension))
+        key = (suite_name, _function, instance, dimension)
+        problem_instance = self.problem_instance_dict.get(key)
+        if problem_instance is not None:
+            problem_instance.file_info.append({'file_name': _file_name, 'single_instance': single_instance})
+        else:
+            problem_instance = ProblemInstanceInfo(_file_name, single_instance, suite_name, _function, instance,
+                                                   dimension)
+            self.problem_instance_dict[key] = problem_instance
+            self.problem_instances.append(problem_instance)
 
     def get_next_problem_instance_info(self):
         """Returns the current ProblemInstanceInfo and increases the counter. If there are no more instances left,
@@ -245,3 +265,13 @@ class ArchiveInfo:
             for file_info in problem_instance.file_info:
                 file_name_set.add(file_info['file_name'])
         return sorted(file_name_set)
+
+
+def _get_archive_file_info_or_warning(args):
+    """Calls get_archive_file_info with the given tuple of arguments and returns its result and None or, if a
+       PreprocessingWarning is raised, None and the warning message (needed by Pool.imap).
+    """
+    try:
+        return get_archive_file_info(*args), None
+    except PreprocessingWarning as warning:
+        return None, str(warning)
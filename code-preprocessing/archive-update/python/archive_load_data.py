@@ -7,6 +7,7 @@ import os
 import os.path
 import re
 import six
+import json
 from time import gmtime, strftime
 from itertools import groupby
 from operator import itemgetter
@@ -177,6 +178,95 @@ def get_instances(file_name):
     return result
 
 
+_instance_blocks_cache = {}
+
+
+def _get_file_stamp(file_name):
+    """Returns the size and modification time of the given file (used to check whether an index is outdated).
+       :param file_name: file name
+    """
+    stat = os.stat(file_name)
+    return [stat.st_size, stat.st_mtime]
+
+
+def get_instance_blocks(file_name, persist=False):
+    """Returns the list of instance blocks contained in the given archive file in the form of the following list of
+       lists:
+       instance1, start1, end1
+       instance2, start2, end2
+       ...
+       where start is the byte offset of the comment line with 'instance = ' and end the byte offset of the next such
+       line (or the end of the file). The index is built in a single pass through the file and kept in memory. If
+       persist is True, it is also stored in (and, if not outdated, read from) the file file_name + '.idx'.
+       :param file_name: archive file name
+       :param persist: whether the index should be stored next to the archive file
+    """
+    file_name = os.path.abspath(file_name)
+    index_file_name = file_name + '.idx'
+    stamp = _get_file_stamp(file_name)
+    result = None
+    persisted = False
+
+    cached = _instance_blocks_cache.get(file_name)
+    if cached is not None and cached[0] == stamp:
+        (stamp, result, persisted) = cached
+        if persisted or not persist:
+            return result
+
+    if persist and os.path.isfile(index_file_name):
+        try:
+            with open(index_file_name, 'r') as f:
+                index = json.load(f)
+            if index['stamp'] == stamp:
+                result = index['blocks']
+                persisted = True
+        except (ValueError, KeyError):
+            pass
+
+    if result is None:
+        result = []
+        offset = 0
+        with open(file_name, 'rb') as f:
+            for line in f:
+                if line[0:1] == b'%' and b'instance' in line:
+                    value = get_key_value(line[1:].decode('utf-8'), 'instance')
+                    if value is not None:
+                        if len(result) > 0:
+                            result[-1][2] = offset
+                        result.append([int(value), offset, None])
+                offset += len(line)
+        if len(result) > 0:
+            result[-1][2] = offset
+
+    if persist and not persisted:
+        with open(index_file_name, 'w') as f:
+            json.dump({'stamp': stamp, 'blocks': result}, f)
+        persisted = True
+
+    _instance_blocks_cache[file_name] = (stamp, result, persisted)
+    return result
+
+
+def read_instance_block(file_name, block):
+    """Yields the lines of the given instance block of the archive file (starting with the line containing the
+       instance information) with universal newlines.
+       :param file_name: archive file name
+       :param block: instance block in the form instance, start, end as returned by get_instance_blocks
+    """
+    (_instance, start, end) = block
+    with open(file_name, 'rb') as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            offset += len(line)
+            line = line.decode('utf-8')
+            if line.endswith('\r\n'):
+                line = line[:-2] + '\n'
+            yield line
+            if offset >= end:
+                break
+
+
 def get_archive_file_info(file_name, functions, instances, dimensions):
     """Returns information on the problem instances contained in the given archive file that also correspond to the
        given functions, instances and dimensions in the form of the following list of lists:
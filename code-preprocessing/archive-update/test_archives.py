@@ -155,6 +155,68 @@ def run_archive_update():
     assert almost_equal(new_hypervolumes.get('bbob-biobj_f51_i02_d05'), 0.920488608198097, precision)
     assert almost_equal(new_hypervolumes.get('bbob-biobj_f52_i07_d02'), 0.920581303184137, precision)
 
+    # Merging with several processes must give the same results
+    parallel_hypervolumes = merge_archives(abspath(join(base_path, 'test-data', 'archives-input')),
+                                           abspath(join(base_path, 'test-data', 'archives-output-parallel')),
+                                           parse_range('1-55'),
+                                           parse_range('1-10'),
+                                           parse_range('2,3,5,10,20,40'),
+                                           False,
+                                           workers=3)
+
+    assert parallel_hypervolumes == new_hypervolumes
+
+    for root, dirs, files in walk(abspath(join(base_path, 'test-data', 'archives-output')), topdown=False):
+        for name in files:
+            assert get_lines(join(root, name)) == get_lines(
+                abspath(join(base_path, 'test-data', 'archives-output-parallel', name)))
+
+
+def run_archive_index():
+    """
+    Tests whether the index of instance blocks persisted by merge_archives() is reused while the archive file is
+    unchanged and rebuilt after the file has changed.
+    """
+    import json
+    from shutil import copy
+    from archive_update import merge_archives
+    from cocoprep import archive_load_data
+    from cocoprep.archive_load_data import parse_range, get_instance_blocks
+
+    base_path = dirname(__file__)
+    index_path = abspath(join(base_path, 'test-data', 'archives-index'))
+    file_name = join(index_path, 'bbob-biobj_f03_d05_nondominated.adat')
+    index_file_name = file_name + '.idx'
+    archive_load_data.create_path(index_path)
+    copy(abspath(join(base_path, 'test-data', 'archives-input', 'bbob-biobj_f03_d05_nondominated.adat')), index_path)
+
+    def merge():
+        archive_load_data._instance_blocks_cache.clear()
+        return merge_archives(index_path, abspath(join(base_path, 'test-data', 'archives-index-output')),
+                              parse_range('3'), parse_range('6-10'), parse_range('5'), False, persist_index=True)
+
+    new_hypervolumes = merge()
+    assert exists(index_file_name)
+    assert len(new_hypervolumes) == 5
+    assert almost_equal(new_hypervolumes.get('bbob-biobj_f03_i06_d05'), 0.038070322787987, 1e-13)
+
+    # A valid index is reused: the (shifted) blocks of the index file are returned
+    with open(index_file_name, 'r') as f:
+        index = json.load(f)
+    blocks = index['blocks']
+    index['blocks'] = [[instance + 100, start, end] for instance, start, end in blocks]
+    with open(index_file_name, 'w') as f:
+        json.dump(index, f)
+    archive_load_data._instance_blocks_cache.clear()
+    assert get_instance_blocks(file_name, True) == index['blocks']
+
+    # After the archive file has changed, the index is rebuilt and stored again
+    with open(file_name, 'a') as f:
+        f.write('% end of file\n')
+    assert merge() == new_hypervolumes
+    with open(index_file_name, 'r') as f:
+        assert json.load(f)['blocks'][:-1] == blocks[:-1]
+
 
 def run_archive_reformat():
     """
@@ -217,6 +279,21 @@ def run_archive_thinning():
             assert compare_files(abspath(join(base_path, 'test-data', 'archives-results', name)),
                                  abspath(join(base_path, 'test-data', 'archives-thinned', name)))
 
+    # Thinning in memory must give the same results
+    archive_thinning(abspath(join(base_path, 'test-data', 'archives-input')),
+                     abspath(join(base_path, 'test-data', 'archives-thinned-in-memory')),
+                     1e-3,
+                     False,
+                     parse_range('1'),
+                     parse_range('1-10'),
+                     parse_range('2,3,5,10,20,40'),
+                     in_memory=True)
+
+    for root, dirs, files in walk(abspath(join(base_path, 'test-data', 'archives-thinned-in-memory')), topdown=False):
+        for name in files:
+            assert compare_files(abspath(join(base_path, 'test-data', 'archives-results', name)),
+                                 abspath(join(base_path, 'test-data', 'archives-thinned-in-memory', name)))
+
 
 def run_archive_analysis():
     """
@@ -301,6 +378,9 @@ def test_all():
     run_archive_update()
     timing.log('run_archive_update done', timing.now())
 
+    run_archive_index()
+    timing.log('run_archive_index done', timing.now())
+
     run_archive_reformat()
     timing.log('run_archive_reformat done', timing.now())
 